@@ -0,0 +1,318 @@
+from settings import *
+from util import *
+import hashlib
+import os
+import tempfile
+import numpy as np
+
+# Netlist parser shared by the placement and partition packages
+# Both packages add this directory to sys.path in util.py, and the settings and
+# util imported here are those of the package that is running
+
+# Netlist files start with a header line (cells, nets and, for placement, rows and
+# columns), followed by one line per net: the number of cells and then the cells
+# The file is read in large chunks and tokenized with NumPy, so the nets come out
+# as flat CSR style arrays without a Python loop over the pins
+
+# Bytes read at a time (files smaller than this are read in one go)
+read_chunk_size = 1 << 26
+
+# Arrays stored in the netlist cache
+cached_arrays = ("header", "net_offsets", "pins", "net_degrees", "cell_offsets", "cell_nets")
+
+# Netlists already loaded by this process, by file name and version
+loaded_netlists = {}
+
+# Kind of each byte value (1 for digits, 2 for white space, 0 for anything else)
+byte_kinds = np.zeros(256, dtype=np.uint8)
+byte_kinds[ord("0"):ord("9") + 1] = 1
+byte_kinds[[ord(" "), ord("\t"), ord("\r"), ord("\n")]] = 2
+
+
+def tokenize(data):
+    '''
+    Convert a block of whole lines to integers
+    Input:
+        data - bytes (ending with a newline)
+    Output:
+        values - every number in the block
+        line_counts - how many numbers are on each line
+    '''
+    buf = np.frombuffer(data, dtype=np.uint8)
+
+    # Only digits and white space are allowed
+    kind = byte_kinds[buf]
+    if not np.all(kind):
+        raise Exception("Unexpected character {!r} in netlist".format(chr(buf[np.argmin(kind)])))
+    digit = kind == 1
+
+    # First and one past the last byte of each number
+    edges = np.diff(digit.view(np.int8), prepend=np.int8(0), append=np.int8(0))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+
+    # Add up the digits, one decimal place at a time
+    values = np.zeros(len(starts), dtype=np.int64)
+    for place in range(int(lengths.max(initial=0))):
+        digits = buf[np.maximum(ends - 1 - place, 0)].astype(np.int64) - ord("0")
+        values += np.where(lengths > place, digits, 0) * 10 ** place
+
+    # Line of each number (number of newlines before it)
+    newline = buf == ord("\n")
+    line = np.cumsum(newline, dtype=np.intp)[starts]
+
+    # The block ends with a newline, so every number is on one of the counted lines
+    line_counts = np.bincount(line, minlength=int(np.count_nonzero(newline)))
+
+    return values, line_counts
+
+
+def read_lines(f, chunk_size=None):
+    '''
+    Tokenize the rest of an open file in chunks of whole lines
+    Input:
+        f - file opened in binary mode
+        chunk_size - bytes to read at a time (defaults to read_chunk_size)
+    Output:
+        values - every number in the file
+        line_counts - how many numbers are on each line
+    '''
+    if chunk_size is None:
+        chunk_size = read_chunk_size
+
+    values = []
+    line_counts = []
+    partial = b""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+
+        # Keep a line that runs past the chunk for the next chunk
+        data = partial + chunk
+        last = data.rfind(b"\n")
+        if last < 0:
+            partial = data
+            continue
+        partial = data[last + 1:]
+
+        chunk_values, chunk_counts = tokenize(data[:last + 1])
+        values.append(chunk_values)
+        line_counts.append(chunk_counts)
+
+    # Last line without a newline
+    if partial:
+        chunk_values, chunk_counts = tokenize(partial + b"\n")
+        values.append(chunk_values)
+        line_counts.append(chunk_counts)
+
+    if not values:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.intp)
+
+    return np.concatenate(values), np.concatenate(line_counts)
+
+
+def read_netlist(filename, chunk_size=None):
+    '''
+    Read a netlist file into flat arrays
+    Input:
+        filename - name of the circuit file
+        chunk_size - bytes to read at a time (defaults to read_chunk_size)
+    Output:
+        header - numbers on the first line
+        net_offsets - offset of each net's first cell in pins (plus the total number of pins)
+        pins - cells of every net, one net after the other
+    '''
+    f = open(filename, "rb")
+    header = [int(value) for value in f.readline().split()]
+    if len(header) < 2:
+        f.close()
+        raise Exception("{}: the first line must have the number of cells and nets".format(filename))
+    n_cells, n_nets = header[0], header[1]
+
+    values, line_counts = read_lines(f, chunk_size)
+    f.close()
+
+    # Lines with a single number (or none) are not nets
+    line_starts = np.zeros(len(line_counts), dtype=np.intp)
+    np.cumsum(line_counts[:-1], out=line_starts[1:])
+    net_lines = np.flatnonzero(line_counts > 1)
+
+    if len(net_lines) < n_nets:
+        raise Exception("{f}: file ended after {r} of {n} nets".format(f=filename, r=len(net_lines), n=n_nets))
+    net_lines = net_lines[:n_nets]
+
+    # Each net line is the number of cells followed by the cells
+    net_starts = line_starts[net_lines]
+    net_degrees = line_counts[net_lines] - 1
+    if np.any(values[net_starts] != net_degrees):
+        net = int(np.argmax(values[net_starts] != net_degrees))
+        raise Exception("{f}: net {n} lists {d} cells but has {c}".format(f=filename, n=net, d=values[net_starts[net]], c=net_degrees[net]))
+
+    net_offsets = np.zeros(n_nets + 1, dtype=np.intp)
+    np.cumsum(net_degrees, out=net_offsets[1:])
+
+    # Drop the count at the start of every net
+    pin_index = np.arange(net_offsets[-1], dtype=np.intp) + np.repeat(net_starts + 1 - net_offsets[:-1], net_degrees)
+    pins = values[pin_index].astype(np.intp)
+
+    if len(pins) > 0 and pins.max() >= n_cells:
+        raise Exception("{f}: cell {c} is out of range ({n} cells)".format(f=filename, c=pins.max(), n=n_cells))
+
+    return header, net_offsets, pins
+
+
+def cell_net_index(n_cells, net_offsets, pins):
+    '''
+    Find the nets on each cell
+    Input:
+        n_cells - number of cells
+        net_offsets, pins - nets as flat arrays (from read_netlist)
+    Output:
+        cell_offsets - offset of each cell's first net in cell_nets (plus the total number of pins)
+        cell_nets - nets of every cell, one cell after the other
+    '''
+    pin_nets = np.repeat(np.arange(len(net_offsets) - 1, dtype=np.intp), np.diff(net_offsets))
+    order = np.argsort(pins, kind="stable")
+
+    cell_offsets = np.zeros(n_cells + 1, dtype=np.intp)
+    np.cumsum(np.bincount(pins, minlength=n_cells), out=cell_offsets[1:])
+
+    return cell_offsets, pin_nets[order]
+
+
+def build_netlist(filename):
+    '''
+    Parse a netlist file into all of its arrays
+    Output:
+        netlist - dictionary of arrays (see cached_arrays)
+    '''
+    header, net_offsets, pins = read_netlist(filename)
+    cell_offsets, cell_nets = cell_net_index(header[0], net_offsets, pins)
+
+    return {
+        "header": np.array(header, dtype=np.int64),
+        "net_offsets": net_offsets,
+        "pins": pins,
+        "net_degrees": np.diff(net_offsets),
+        "cell_offsets": cell_offsets,
+        "cell_nets": cell_nets,
+    }
+
+
+def file_hash(filename):
+    '''
+    Hash of the contents of a file
+    '''
+    digest = hashlib.sha256()
+    f = open(filename, "rb")
+    for block in iter(lambda: f.read(1 << 20), b""):
+        digest.update(block)
+    f.close()
+
+    return digest.hexdigest()
+
+
+def load_netlist(filename, cache_dir=None):
+    '''
+    Load the arrays of a netlist, from the binary cache if the file has been parsed before
+    Cached arrays are memory-mapped read-only, so processes loading the same
+    netlist share the operating system's copy of it
+    Input:
+        filename - name of the circuit file
+        cache_dir - directory of the cache (defaults to netlist_cache_dir, None in settings to disable)
+    Output:
+        netlist - dictionary of arrays (see cached_arrays)
+    '''
+    if cache_dir is None:
+        cache_dir = netlist_cache_dir
+    if cache_dir is None:
+        return build_netlist(filename)
+
+    # Reuse the arrays if this process already loaded the same version of the file
+    status = os.stat(filename)
+    key = (os.path.abspath(filename), status.st_size, status.st_mtime_ns, cache_dir)
+    if key not in loaded_netlists:
+        loaded_netlists[key] = load_entry(filename, cache_dir)
+
+    return loaded_netlists[key]
+
+
+def load_entry(filename, cache_dir):
+    '''
+    Load the arrays of a netlist from its cache entry, parsing the file first if there is no entry
+    '''
+
+    # Each version of a file has its own entry
+    name = os.path.splitext(os.path.basename(filename))[0]
+    entry = os.path.join(cache_dir, "{n}-{h}".format(n=name, h=file_hash(filename)[:16]))
+
+    if not os.path.isdir(entry):
+        netlist = build_netlist(filename)
+
+        # Write to a temporary directory and rename it, so other processes never see a partial entry
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = tempfile.mkdtemp(dir=cache_dir)
+        for key in cached_arrays:
+            np.save(os.path.join(temporary, key + ".npy"), netlist[key])
+        try:
+            os.rename(temporary, entry)
+        except OSError:
+            # Another process already added the same entry
+            for key in cached_arrays:
+                os.remove(os.path.join(temporary, key + ".npy"))
+            os.rmdir(temporary)
+
+        debug_print("Cached {f} in {e}".format(f=filename, e=entry))
+
+    return {key: np.load(os.path.join(entry, key + ".npy"), mmap_mode="r") for key in cached_arrays}
+
+
+def parse_file(filename):
+    '''
+    Parse input file
+    Input:
+        filename - name of the circuit
+    Output:
+        configs - configurations for the circuit
+        nets - list of nets and the cells for each
+    '''
+    netlist = load_netlist(filename)
+    header = netlist["header"].tolist()
+    net_offsets = netlist["net_offsets"]
+    pins = netlist["pins"]
+
+    # First line has the configurations (the file name lets other processes load the cached arrays)
+    configs = {}
+    configs["filename"] = filename
+    configs["cells"] = header[0]
+    configs["nets"] = header[1]
+    if len(header) >= 4:
+        configs["rows"] = header[2]
+        configs["cols"] = header[3]
+        debug_print("{c} cells to be places in {r} x {col} (= {t}) grid with {n} nets.".format(c=configs["cells"], r=configs["rows"], col=configs["cols"], t=configs["rows"]*configs["cols"] ,n=configs["nets"]))
+    else:
+        debug_print("{c} cells, {n} nets to be partitioned.".format(c=configs["cells"], n=configs["nets"]))
+
+    # Split the flat pin list into the cells of each net
+    pins = pins.tolist()
+    offsets = net_offsets.tolist()
+    nets = [pins[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    if debug:
+        debug_print("Nets:")
+        debug_print(nets)
+
+    return configs, nets
+
+
+def worker_nets(configs, nets):
+    '''
+    Nets to send to worker processes
+    Workers load the cached arrays themselves when the circuit came from a file
+    (configs has its file name), so the nets are only sent for other circuits
+    '''
+    if "filename" in configs:
+        return None
+    return nets
@@ -0,0 +1,70 @@
+from settings import *
+import bisect
+import random
+import numpy as np
+
+# Parent selection shared by the placement and partition packages
+# (both add this directory to sys.path in util.py)
+
+
+class RouletteWheel:
+    '''
+    Fitness proportional selection of population members
+    The cumulative weights are built once per generation, after which each draw
+    is a binary search (O(log P))
+    '''
+
+    # Redraws before falling back to a draw that excludes the first parent
+    max_redraws = 8
+
+    def __init__(self, weights):
+        '''
+        Input:
+            weights - fit of each member of the population (all positive)
+        '''
+        self.cumulative = np.cumsum(weights, dtype=float).tolist()
+        self.weights = weights
+        self.total = self.cumulative[-1]
+
+
+    def draw(self):
+        '''
+        Choose a member with probability proportional to its weight
+        '''
+        slot = bisect.bisect_right(self.cumulative, random.random() * self.total)
+        return min(slot, len(self.cumulative) - 1)
+
+
+    def draw_excluding(self, excluded):
+        '''
+        Choose a member among those for which excluded(slot) is False (O(P))
+        '''
+        weights = [0 if excluded(slot) else weight for slot, weight in enumerate(self.weights)]
+        return random.choices(range(len(weights)), weights=weights)[0]
+
+
+    def draw_pair(self, same, distinct):
+        '''
+        Choose two parents holding different genes
+        Input:
+            same - same(slot1, slot2) is True when both members hold the same gene
+            distinct - number of distinct genes in the population
+        Output:
+            parent1, parent2 - population slots of the parents
+        '''
+        parent1 = self.draw()
+        parent2 = self.draw()
+
+        # Check that the parents are different (unless the entire population is identical)
+        if distinct > 1:
+            redraws = 0
+            while same(parent1, parent2):
+                # Converged populations could keep drawing the same gene
+                if redraws == self.max_redraws:
+                    parent2 = self.draw_excluding(lambda slot: same(parent1, slot))
+                    break
+
+                parent2 = self.draw()
+                redraws += 1
+
+        return parent1, parent2
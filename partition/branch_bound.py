@@ -0,0 +1,224 @@
+from util import *
+from settings import *
+import concurrent.futures
+import multiprocessing
+
+# Exact bipartitioning by branch and bound
+# Cells are assigned one at a time (cell 0 is fixed to the left, since a
+# partition and its complement have the same cut), and a branch is pruned as soon
+# as the nets it has already cut reach the best cut size found so far.
+# The first levels of the tree are split into subtrees that are searched on
+# worker processes, which share the best cut size through a multiprocessing Value
+
+
+class BranchAndBound:
+    '''
+    Depth first search over the assignments of one subtree
+    The cut size of the assigned cells is tracked per net, so assigning or
+    unassigning a cell only touches the nets of that cell
+    '''
+
+    def __init__(self, n_cells, nets, order, max_side):
+        '''
+        Input:
+            n_cells - number of cells
+            nets - list of nets and the cells for each
+            order - order in which the cells are assigned (cell 0 first)
+            max_side - largest number of cells on one side
+        '''
+        self.n_cells = n_cells
+        self.order = order
+        self.max_side = max_side
+
+        # Nets touching each cell
+        self.cell_nets = [[] for i in range(n_cells)]
+        for n, net in enumerate(nets):
+            for cell in set(net):
+                self.cell_nets[cell].append(n)
+        self.n_nets = len(nets)
+
+
+    def assign(self, cell, side):
+        '''
+        Put a cell on a side and update the cut size
+        '''
+        self.sides[cell] = side
+        self.size[side] += 1
+        counts = self.counts[side]
+        others = self.counts[1 - side]
+        for net in self.cell_nets[cell]:
+            counts[net] += 1
+            if counts[net] == 1 and others[net] > 0:
+                self.cut += 1
+
+
+    def unassign(self, cell):
+        '''
+        Remove a cell from its side and update the cut size
+        '''
+        side = self.sides[cell]
+        self.sides[cell] = -1
+        self.size[side] -= 1
+        counts = self.counts[side]
+        others = self.counts[1 - side]
+        for net in self.cell_nets[cell]:
+            counts[net] -= 1
+            if counts[net] == 0 and others[net] > 0:
+                self.cut -= 1
+
+
+    def solve(self, prefix, bound):
+        '''
+        Search the subtree below a partial assignment
+        Input:
+            prefix - sides of the first cells in the assignment order
+            bound - shared multiprocessing Value with the best cut size found on any process
+        Output:
+            cut - best cut size found in the subtree (None if nothing beat the bound)
+            gene - packed gene of the best partition in the subtree
+            nodes - number of nodes searched
+        '''
+        self.sides = [-1] * self.n_cells
+        self.size = [0, 0]
+        self.counts = [[0] * self.n_nets, [0] * self.n_nets]
+        self.cut = 0
+        self.nodes = 0
+        self.bound = bound
+        self.best_cut = bound.value
+        self.best_sides = None
+
+        for cell, side in zip(self.order, prefix):
+            self.assign(cell, side)
+
+        if max(self.size) <= self.max_side and self.cut < self.best_cut:
+            self.search(len(prefix))
+
+        if self.best_sides is None:
+            return None, None, self.nodes
+
+        gene = sum(1 << cell for cell, side in enumerate(self.best_sides) if side == 1)
+        return self.best_cut, gene, self.nodes
+
+
+    def search(self, depth):
+        '''
+        Assign the cell at a depth to each side and search below it
+        '''
+        self.nodes += 1
+
+        # Pick up better cut sizes found on other processes
+        if self.nodes % 1024 == 0:
+            self.best_cut = min(self.best_cut, self.bound.value)
+
+        # Every cell is assigned
+        if depth == self.n_cells:
+            self.best_cut = self.cut
+            self.best_sides = self.sides[:]
+            with self.bound.get_lock():
+                if self.cut < self.bound.value:
+                    self.bound.value = self.cut
+            return
+
+        cell = self.order[depth]
+        for side in (0, 1):
+            if self.size[side] == self.max_side:
+                continue
+
+            # Only continue while the cut can still beat the best
+            self.assign(cell, side)
+            if self.cut < self.best_cut:
+                self.search(depth + 1)
+            self.unassign(cell)
+
+
+def assignment_order(n_cells, nets):
+    '''
+    Order the cells so that connected cells are assigned close together
+    (nets are cut, and branches pruned, as early as possible)
+    Breadth first from cell 0, taking the most connected cells first
+    '''
+    neighbours = [set() for i in range(n_cells)]
+    for net in nets:
+        for cell in net:
+            neighbours[cell].update(net)
+
+    order = []
+    seen = [False] * n_cells
+    for start in [0] + sorted(range(n_cells), key=lambda cell: -len(neighbours[cell])):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = [start]
+        while queue:
+            cell = queue.pop(0)
+            order.append(cell)
+            for other in sorted(neighbours[cell], key=lambda other: -len(neighbours[other])):
+                if not seen[other]:
+                    seen[other] = True
+                    queue.append(other)
+
+    return order
+
+
+# Search state of each worker process
+worker = None
+worker_bound = None
+
+
+def init_worker(n_cells, nets, order, max_side, bound):
+    '''
+    Set up the search on a worker process
+    '''
+    global worker, worker_bound
+    worker = BranchAndBound(n_cells, nets, order, max_side)
+    worker_bound = bound
+
+
+def solve_subtree(prefix):
+    '''
+    Search one subtree on a worker process
+    '''
+    return worker.solve(prefix, worker_bound)
+
+
+def branch_and_bound(configs, nets, initial_gene, initial_cut, workers=None):
+    '''
+    Find a partition with the smallest cut size
+    Input:
+        configs - circuit configurations
+        nets - list of nets and the cells for each
+        initial_gene - packed gene of a known partition (e.g. from the genetics partitioner)
+        initial_cut - cut size of the known partition (the initial bound)
+        workers - number of worker processes (None for one per CPU)
+    Output:
+        gene - packed gene of an optimal partition
+        cutsize - optimal cut size
+        nodes - number of nodes searched
+    '''
+    n_cells = configs["cells"]
+    max_side = (n_cells + allowed_imbalance(n_cells)) // 2
+    order = assignment_order(n_cells, nets)
+
+    # Split the tree into enough subtrees to keep every worker busy (cell 0 is always on the left)
+    n_workers = workers if workers is not None else multiprocessing.cpu_count()
+    depth = 1
+    while 2 ** (depth - 1) < 8 * n_workers and depth < min(n_cells, 16):
+        depth += 1
+    prefixes = [[0] + [prefix >> i & 1 for i in range(depth - 1)] for prefix in range(2 ** (depth - 1))]
+
+    bound = multiprocessing.Value("i", initial_cut)
+    gene, cutsize, nodes = initial_gene, initial_cut, 0
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(n_cells, nets, order, max_side, bound)
+    ) as pool:
+        for cut, subtree_gene, subtree_nodes in pool.map(solve_subtree, prefixes):
+            nodes += subtree_nodes
+            if cut is not None and cut < cutsize:
+                gene, cutsize = subtree_gene, cut
+
+    debug_print("Branch and bound: {n} nodes, cut size = {c}".format(n=nodes, c=cutsize))
+
+    return gene, cutsize, nodes
@@ -0,0 +1,284 @@
+from settings import *
+import numpy as np
+
+
+class CutSizeKernel:
+    '''
+    Vectorized cut size for a circuit
+    The nets are flattened once into a CSR style pin list so that the cut of
+    every net can be found with NumPy min/max reductions
+    '''
+
+    def __init__(self, n_cells, nets):
+        '''
+        Build the flat net arrays for the current circuit
+        Input:
+            n_cells - number of cells
+            nets - list of nets and the cells for each
+        '''
+
+        # Nets without cells can never be cut
+        nets = [net for net in nets if len(net) > 0]
+
+        # Offset of each net's first cell in the flat list of the cells on every net
+        net_offsets = np.zeros(len(nets) + 1, dtype=np.intp)
+        np.cumsum(np.array([len(net) for net in nets], dtype=np.intp), out=net_offsets[1:])
+        pins = np.array([cell for net in nets for cell in net], dtype=np.intp)
+
+        self.set_arrays(n_cells, net_offsets, pins)
+
+
+    @classmethod
+    def from_netlist(cls, netlist):
+        '''
+        Create a kernel from the arrays of a parsed netlist (from load_netlist) without copying them
+        '''
+        kernel = cls.__new__(cls)
+        kernel.set_arrays(int(netlist["header"][0]), netlist["net_offsets"], netlist["pins"], netlist["cell_offsets"], netlist["cell_nets"])
+
+        return kernel
+
+
+    def set_arrays(self, n_cells, net_offsets, pins, cell_offsets=None, cell_nets=None):
+        '''
+        Set up the kernel from flat net arrays
+        Input:
+            n_cells - number of cells
+            net_offsets, pins - cells of every net in CSR form (no net is empty)
+            cell_offsets, cell_nets - nets of every cell in CSR form (found from the nets if not given)
+        '''
+        self.n_cells = n_cells
+        self.n_nets = len(net_offsets) - 1
+
+        # Number of cells on each net and offset of its first cell in the flat pin list
+        self.net_offsets = net_offsets
+        self.net_starts = net_offsets[:-1]
+        self.net_degrees = np.diff(net_offsets)
+
+        # Flat list of the cells on every net and the net of every pin
+        self.pins = pins
+        self.pin_nets = np.repeat(np.arange(self.n_nets, dtype=np.intp), self.net_degrees)
+
+        # Nets touching each cell (one entry per pin)
+        if cell_nets is None:
+            cell_offsets = np.zeros(n_cells + 1, dtype=np.intp)
+            np.cumsum(np.bincount(pins, minlength=n_cells), out=cell_offsets[1:])
+            cell_nets = self.pin_nets[np.argsort(pins, kind="stable")]
+
+        # Nets of each cell, cells of each net and net sizes as lists for per-cell updates
+        self.cell_nets = split_segments(cell_offsets, cell_nets)
+        self.net_cells = split_segments(net_offsets, pins)
+        self.degrees = self.net_degrees.tolist()
+
+
+    def net_cut(self, sides):
+        '''
+        Find which nets are cut
+        Input:
+            sides - side of each cell (0 left, 1 right, -1 unassigned),
+                    or a (population x cells) matrix of them
+        Output:
+            cut - True for each net with cells on both sides (per gene)
+        '''
+        if self.n_nets == 0:
+            return np.zeros(np.shape(sides)[:-1] + (0,), dtype=bool)
+
+        # Side of every pin (last axis runs over the pins)
+        values = np.asarray(sides, dtype=np.int8)[..., self.pins]
+        axis = values.ndim - 1
+
+        # Unassigned cells are on neither side
+        low = values
+        high = values
+        if np.any(values < 0):
+            low = np.where(values < 0, 1, values)
+            high = np.where(values < 0, 0, values)
+
+        # Cut if the smallest side is left and the largest is right
+        return (np.minimum.reduceat(low, self.net_starts, axis=axis) == 0) & (np.maximum.reduceat(high, self.net_starts, axis=axis) == 1)
+
+
+    def cut_size(self, sides):
+        '''
+        Calculate the cut size
+        Input:
+            sides - side of each cell, or a (population x cells) matrix of them
+        Output:
+            cut_size - number of cut nets (per gene)
+        '''
+        return self.net_cut(sides).sum(axis=-1)
+
+
+    def right_counts(self, sides):
+        '''
+        Count the cells on the right side of each net
+        Input:
+            sides - side of each cell (0 left, 1 right), or a (population x cells) matrix of them
+        Output:
+            counts - number of pins on the right for each net (per gene)
+        '''
+        if self.n_nets == 0:
+            return np.zeros(np.shape(sides)[:-1] + (0,), dtype=np.intp)
+
+        values = np.asarray(sides, dtype=np.intp)[..., self.pins]
+        return np.add.reduceat(values, self.net_starts, axis=values.ndim - 1)
+
+
+class CutState:
+    '''
+    Incremental cut size of one gene
+    Tracks the number of cells on the right side of every net along with the
+    running cut size and the number of cells on the right, so flipping a cell
+    only touches the nets of that cell
+    '''
+
+    def __init__(self, kernel, gene, right, cut, n_right=None):
+        '''
+        Input:
+            kernel - CutSizeKernel of the circuit
+            gene - packed gene (bit i is the side of cell i)
+            right - list with the number of pins on the right for each net
+            cut - number of cut nets
+            n_right - number of cells on the right (counted from the gene if not given)
+        '''
+        self.kernel = kernel
+        self.gene = gene
+        self.right = right
+        self.cut = cut
+        self.n_right = gene.bit_count() if n_right is None else n_right
+
+
+    @classmethod
+    def from_counts(cls, kernel, gene, right):
+        '''
+        Create the state of a gene from its per-net right counts
+        '''
+        right = list(right)
+        cut = sum(1 for count, degree in zip(right, kernel.degrees) if 0 < count < degree)
+        return cls(kernel, gene, right, cut)
+
+
+    @classmethod
+    def from_gene(cls, kernel, gene):
+        '''
+        Create the state of a gene from scratch (O(pins))
+        '''
+        sides = genes_to_sides([gene], kernel.n_cells)[0]
+        return cls.from_counts(kernel, gene, kernel.right_counts(sides).tolist())
+
+
+    def copy(self):
+        return CutState(self.kernel, self.gene, self.right[:], self.cut, self.n_right)
+
+
+    def complement(self):
+        '''
+        Swap the sides of every cell (the cut size is unchanged)
+        '''
+        self.gene ^= (1 << self.kernel.n_cells) - 1
+        self.right = [degree - count for count, degree in zip(self.right, self.kernel.degrees)]
+        self.n_right = self.kernel.n_cells - self.n_right
+
+
+    def flip(self, cell):
+        '''
+        Move a cell to the other side (O(cell degree))
+        '''
+        step = -1 if self.gene >> cell & 1 else 1
+        right = self.right
+        degrees = self.kernel.degrees
+
+        for net in self.kernel.cell_nets[cell]:
+            before = 0 < right[net] < degrees[net]
+            right[net] += step
+            after = 0 < right[net] < degrees[net]
+            self.cut += after - before
+
+        self.gene ^= 1 << cell
+        self.n_right += step
+
+
+    def flip_all(self, cells):
+        '''
+        Move every cell set in a packed mask to the other side
+        '''
+        while cells:
+            low = cells & -cells
+            self.flip(low.bit_length() - 1)
+            cells ^= low
+
+
+    def gain(self, cell):
+        '''
+        Reduction in cut size if a cell were moved to the other side
+        '''
+        gain = 0
+        on_right = self.gene >> cell & 1
+
+        for net in self.kernel.cell_nets[cell]:
+            # Cells of the net on the cell's side and on the other side
+            same = self.right[net] if on_right else self.kernel.degrees[net] - self.right[net]
+            other = self.kernel.degrees[net] - same
+
+            # Net becomes uncut if the cell is the last one on its side
+            if same == 1 and other > 0:
+                gain += 1
+            # Net becomes cut if the cell leaves a net that is all on its side
+            elif other == 0 and same > 1:
+                gain -= 1
+
+        return gain
+
+
+    def imbalance(self):
+        '''
+        Number of cells on the right minus the number on the left
+        '''
+        return 2 * self.n_right - self.kernel.n_cells
+
+
+    def gains(self):
+        '''
+        Gain of every cell at once (same as gain(cell) for each cell)
+        Output:
+            gains - array with the reduction in cut size if each cell were moved
+        '''
+        kernel = self.kernel
+        if kernel.n_nets == 0:
+            return np.zeros(kernel.n_cells, dtype=np.intp)
+
+        # Cells of each pin's net on the pin's side and on the other side
+        right = np.asarray(self.right, dtype=np.intp)[kernel.pin_nets]
+        degree = kernel.net_degrees[kernel.pin_nets]
+        on_right = genes_to_sides([self.gene], kernel.n_cells)[0][kernel.pins].astype(bool)
+        same = np.where(on_right, right, degree - right)
+        other = degree - same
+
+        # +1 for each net the cell would uncut, -1 for each net it would cut
+        pin_gain = ((same == 1) & (other > 0)).astype(np.intp) - ((other == 0) & (same > 1))
+        return np.bincount(kernel.pins, weights=pin_gain, minlength=kernel.n_cells).astype(np.intp)
+
+
+def genes_to_sides(genes, n_cells):
+    '''
+    Unpack genes into a matrix of sides
+    Input:
+        genes - list of packed genes (bit i is the side of cell i)
+        n_cells - number of cells
+    Output:
+        sides - (population x cells) matrix of 0 (left) / 1 (right)
+    '''
+    n_bytes = (n_cells + 7) // 8
+    packed = np.frombuffer(b"".join(gene.to_bytes(n_bytes, "little") for gene in genes), dtype=np.uint8)
+
+    return np.unpackbits(packed.reshape(len(genes), n_bytes), axis=1, count=n_cells, bitorder="little")
+
+
+def split_segments(offsets, values):
+    '''
+    Split a CSR array into a list of lists (row i is values[offsets[i]:offsets[i+1]])
+    '''
+    values = values.tolist()
+    offsets = offsets.tolist()
+
+    return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
@@ -0,0 +1,242 @@
+from util import *
+from settings import *
+from cutsize import *
+import numpy as np
+
+
+class GainBuckets:
+    '''
+    Bucket list of cell gains for the Fiduccia-Mattheyses pass
+    Each side has one bucket per possible gain, with a pointer to the highest
+    bucket that may be non-empty, so inserting, removing and finding the best
+    cell are O(1) (amortized over a pass)
+    '''
+
+    def __init__(self, max_gain):
+        '''
+        Input:
+            max_gain - largest possible gain (the largest number of nets on a cell)
+        '''
+        self.offset = max_gain
+        self.buckets = [[{} for i in range(2 * max_gain + 1)] for side in (0, 1)]
+        self.top = [-1, -1]
+        self.gain = {}
+        self.side = {}
+
+
+    def insert(self, cell, side, gain):
+        '''
+        Add a free cell on a side with its gain
+        '''
+        index = gain + self.offset
+        self.buckets[side][index][cell] = True
+        self.gain[cell] = gain
+        self.side[cell] = side
+        if index > self.top[side]:
+            self.top[side] = index
+
+
+    def remove(self, cell):
+        '''
+        Remove a cell (it is locked or its gain is changing)
+        '''
+        side = self.side.pop(cell)
+        del self.buckets[side][self.gain.pop(cell) + self.offset][cell]
+
+
+    def update(self, cell, gain):
+        '''
+        Change the gain of a free cell
+        '''
+        if cell in self.gain and self.gain[cell] != gain:
+            side = self.side[cell]
+            self.remove(cell)
+            self.insert(cell, side, gain)
+
+
+    def best(self, side):
+        '''
+        Free cell with the highest gain on a side (None if there are none)
+        '''
+        buckets = self.buckets[side]
+        while self.top[side] >= 0 and not buckets[self.top[side]]:
+            self.top[side] -= 1
+
+        if self.top[side] < 0:
+            return None
+
+        return next(iter(buckets[self.top[side]]))
+
+
+def fm_pass(state, max_imbalance, weights=None):
+    '''
+    Run one Fiduccia-Mattheyses pass on a partition
+    Every cell is moved at most once, always taking the free cell with the highest
+    gain whose move keeps the sides within one cell of the allowed imbalance
+    Moves after the best legal point of the pass are rolled back
+    Input:
+        state - CutState of the partition (updated in place)
+        max_imbalance - largest allowed difference between the side sizes
+        weights - size of each cell (defaults to 1 for every cell)
+    Output:
+        improvement - reduction in cut size
+    '''
+    kernel = state.kernel
+    n_cells = kernel.n_cells
+
+    # Side sizes (difference is right - left)
+    if weights is None:
+        weights = [1] * n_cells
+        difference = state.imbalance()
+    else:
+        difference = side_difference(state.gene, weights)
+    slack = max(weights, default=1)
+
+    # Put every cell in the gain buckets
+    max_gain = max([len(nets) for nets in kernel.cell_nets], default=0)
+    buckets = GainBuckets(max_gain)
+    for cell in range(n_cells):
+        buckets.insert(cell, state.gene >> cell & 1, state.gain(cell))
+
+    start_cut = state.cut
+    best_cut = start_cut if abs(difference) <= max_imbalance else None
+    best_moves = 0
+    moves = []
+
+    while True:
+        # Best cell on each side that can move without breaking the balance limit
+        cell = None
+        for side in (0, 1):
+            candidate = buckets.best(side)
+            if candidate is None:
+                continue
+
+            # Moving a cell from the left adds twice its size to the difference, from the right subtracts it
+            after = difference + (2 if side == 0 else -2) * weights[candidate]
+            if abs(after) > max_imbalance + slack and abs(after) >= abs(difference):
+                continue
+
+            if cell is None or buckets.gain[candidate] > buckets.gain[cell]:
+                cell = candidate
+
+        # Stop once no cell can move
+        if cell is None:
+            break
+
+        # Lock and move the cell
+        side = buckets.side[cell]
+        buckets.remove(cell)
+        state.flip(cell)
+        moves.append(cell)
+        difference += (2 if side == 0 else -2) * weights[cell]
+
+        # Update gains of free cells on critical nets
+        for net in kernel.cell_nets[cell]:
+            to_count = state.right[net] if side == 0 else kernel.degrees[net] - state.right[net]
+            from_count = kernel.degrees[net] - to_count
+            if to_count <= 2 or from_count <= 1:
+                for other in kernel.net_cells[net]:
+                    if other in buckets.gain:
+                        buckets.update(other, state.gain(other))
+
+        # Track the best legal point of the pass
+        if abs(difference) <= max_imbalance and (best_cut is None or state.cut < best_cut):
+            best_cut = state.cut
+            best_moves = len(moves)
+
+    # Roll back to the best point
+    for cell in reversed(moves[best_moves:]):
+        state.flip(cell)
+
+    return start_cut - state.cut
+
+
+def fm_refine(state, max_imbalance=1, passes=None, weights=None):
+    '''
+    Refine a partition with Fiduccia-Mattheyses passes until it stops improving
+    Input:
+        state - CutState of the partition (not modified)
+        max_imbalance - largest allowed difference between the side sizes
+        passes - largest number of passes (defaults to fm_passes)
+        weights - size of each cell (defaults to 1 for every cell)
+    Output:
+        state - CutState of the refined partition
+    '''
+    if passes is None:
+        passes = fm_passes
+
+    state = state.copy()
+    for i in range(passes):
+        if fm_pass(state, max_imbalance, weights) <= 0:
+            break
+
+    return state
+
+
+def side_difference(gene, weights):
+    '''
+    Total size of the cells on the right minus the total size on the left
+    '''
+    return sum(weight if gene >> cell & 1 else -weight for cell, weight in enumerate(weights))
+
+
+def rebalance(state, max_imbalance, weights=None):
+    '''
+    Greedily move cells off the larger side until the sides are within the allowed imbalance
+    Cells with the highest gain are moved first
+    Input:
+        state - CutState of the partition (updated in place)
+        max_imbalance - largest allowed difference between the side sizes
+        weights - size of each cell (defaults to 1 for every cell)
+    '''
+    if weights is None:
+        weights = [1] * state.kernel.n_cells
+
+    difference = side_difference(state.gene, weights)
+    if abs(difference) <= max_imbalance:
+        return
+
+    # Cells on the larger side, best gain first
+    side = 1 if difference > 0 else 0
+    sign = 1 if difference > 0 else -1
+    candidates = [cell for cell in range(state.kernel.n_cells) if state.gene >> cell & 1 == side]
+    candidates.sort(key=state.gain, reverse=True)
+
+    for cell in candidates:
+        if abs(difference) <= max_imbalance:
+            break
+
+        # Only move cells that bring the sides closer
+        after = difference - sign * 2 * weights[cell]
+        if abs(after) < abs(difference):
+            state.flip(cell)
+            difference = after
+
+
+def repair_balance(state, max_imbalance):
+    '''
+    Move the cells on the larger side that cost the least (highest gain) all at once
+    Input:
+        state - CutState of the partition (not modified)
+        max_imbalance - largest allowed difference between the side sizes
+    Output:
+        state - CutState of the balanced partition
+    '''
+    imbalance = state.imbalance()
+    if abs(imbalance) <= max_imbalance:
+        return state
+
+    # Enough cells on the larger side to get within the allowed imbalance
+    side = 1 if imbalance > 0 else 0
+    count = (abs(imbalance) - max_imbalance + 1) // 2
+
+    # Pick the cells with the highest gains
+    candidates = np.flatnonzero(genes_to_sides([state.gene], state.kernel.n_cells)[0] == side)
+    gains = state.gains()[candidates]
+    chosen = candidates[np.argpartition(-gains, count - 1)[:count]]
+
+    state = state.copy()
+    for cell in chosen.tolist():
+        state.flip(cell)
+
+    return state
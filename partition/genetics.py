@@ -1,6 +1,13 @@
 from util import *
 from settings import *
+from selection import *
+from fm import *
+from pipeline import *
+from netlist_parser import *
+import concurrent.futures
+import multiprocessing
 import random
+from collections import OrderedDict
 
 
 class Genetics():
@@ -13,15 +20,42 @@ class Genetics():
         Initialize with canvas
         '''
         self.c = canvas
+        self.pool = None
         
         
+    def close(self):
+        '''
+        Stop the evaluator processes of the pipeline (if any)
+        '''
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            
+            
     def setup(self, configs, nets):
         '''
         Set up the class with the current circuit parameters
         '''
+        # Evaluators from a previous circuit
+        self.close()
+        
         self.configs = configs
         self.nets = nets
         
+        # Flat pin list and cell to net index for scoring (using the cached arrays of the file, if there is one)
+        if "filename" in configs:
+            self.kernel = CutSizeKernel.from_netlist(load_netlist(configs["filename"]))
+        else:
+            self.kernel = CutSizeKernel(configs["cells"], nets)
+        
+        # Largest allowed difference between the side sizes
+        self.max_imbalance = allowed_imbalance(configs["cells"])
+        
+        # Cut sizes of the genes scored in the whole run, least recently used first
+        self.fitness_cache = OrderedDict()
+        self.cache_lookups = 0
+        self.cache_hits = 0
+        
         
     def clear(self):
         '''
@@ -48,6 +82,8 @@ class Genetics():
         # Reset/Initialie variables
         self.population = []
         self.population_cutsize = {}
+        self.population_state = {}
+        self.gene_count = {}
         
         # Generate a random population of partitions
         self.random_population()
@@ -55,9 +91,10 @@ class Genetics():
         # Calculate the cut size for each member of the population
         self.match_cutsize()
             
-        debug_print("Initial population generated.")
-        for gene in self.population:
-            debug_print("{g}: {c}".format(g=gene, c=self.population_cutsize[gene]))
+        if debug:
+            debug_print("Initial population generated.")
+            for gene in self.population:
+                debug_print("{g}: {c}".format(g=gene_to_string(gene, self.configs["cells"]), c=self.population_cutsize[gene]))
             
         # Choose the best initial partition
         debug_print("Choose best initial partition.")
@@ -73,8 +110,30 @@ class Genetics():
         '''
         Run the genetics algorithm
         '''
+        self.search()
         
-        for i in range(0, n_iterations):
+        print("DONE")
+        self.print_results()
+        
+        # Update the canvas with the final results
+        if gui:
+            self.c.delete("cell")
+            self.c.delete("wire")
+            self.c.delete("cost")
+            draw_partition(self.c, self.partition, self.configs, self.nets)
+            write_cutsize(self.c, self.current_cutsize)
+        
+            self.c.update()
+        
+        
+    def evolve(self, iterations):
+        '''
+        Evolve the population one pair of children at a time
+        Input:
+            iterations - number of pairs of children to create
+        '''
+        
+        for i in range(0, iterations):
             
             # Determine fit function
             debug_print("Determine fit function.")
@@ -95,34 +154,86 @@ class Genetics():
             debug_print("Mutate children.")
             child1, child2 = self.mutate(child1, child2)
             
+            # Score children from the cache or from their parents
+            debug_print("Score children.")
+            child1 = self.score_child(child1, (parent1, parent2))
+            child2 = self.score_child(child2, (parent1, parent2))
+            
+            # Make sure children are legal (balanced partition)
+            child1 = self.make_legal(child1, (parent1, parent2))
+            child2 = self.make_legal(child2, (parent1, parent2))
+            
+            # Improve children with a local search
+            if fm_refinement:
+                debug_print("Refine children.")
+                child1 = self.refine_child(child1, (parent1, parent2))
+                child2 = self.refine_child(child2, (parent1, parent2))
+            
             # Replace weakest members of the population with children
             debug_print("Update population")
             self.replace_population(child1, child2)
             
-            debug_print("New population")
-            for gene in self.population:
-                debug_print("{g}: {c}".format(g=gene, c=self.population_cutsize[gene]))
+            if debug:
+                debug_print("New population")
+                for gene in self.population:
+                    debug_print("{g}: {c}".format(g=gene_to_string(gene, self.configs["cells"]), c=self.population_cutsize[gene]))
             
-        # Choose the best solution in the population
-        self.choose_best_gene()
-        
-        # Double check that the partition is legal
-        assert(check_legality(self.partition, self.configs["cells"]))
-        
-        print("DONE")
-        self.print_results()
-        
-        # Update the canvas with the final results
-        if gui:
-            self.c.delete("cell")
-            self.c.delete("wire")
-            self.c.delete("cost")
-            draw_partition(self.c, self.partition, self.configs, self.nets)
-            write_cutsize(self.c, self.current_cutsize)
-        
-            self.c.update()
+            
+    def evolve_pipelined(self, iterations):
+        '''
+        Evolve the population with an asynchronous steady-state pipeline
+        Children are created, scored and made legal here, and refined in batches
+        on a pool of evaluator processes. Each refined batch replaces the weakest
+        members as soon as it arrives (there is no generation barrier), while new
+        children keep every evaluator busy
+        Input:
+            iterations - number of pairs of children to create
+        '''
+        
+        # The evaluators are started once and kept for every later run
+        if self.pool is None:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=pipeline_workers,
+                initializer=init_evaluator,
+                initargs=(self.configs, worker_nets(self.configs, self.nets))
+            )
+            
+        in_flight = set()
+        batch = []
+        produced = 0
         
+        # Keep enough batches queued that no evaluator waits for the next one
+        depth = 2 * pipeline_workers
         
+        while produced < iterations or in_flight:
+            
+            # Create new children until enough batches are queued
+            while produced < iterations and len(in_flight) < depth:
+                self.population_fit = {}
+                self.set_fit_function()
+                parent1, parent2 = self.select_gene()
+                child1, child2 = self.crossover(parent1, parent2)
+                child1, child2 = self.mutate(child1, child2)
+                produced += 1
+                
+                # Score and repair here, from the parents' per-net counts
+                for child in (child1, child2):
+                    child = self.make_legal(self.score_child(child, (parent1, parent2)), (parent1, parent2))
+                    batch.append(child[0])
+                    
+                if len(batch) >= pipeline_batch_size or produced == iterations:
+                    in_flight.add(self.pool.submit(refine_children, batch))
+                    batch = []
+                    
+            # Fold in whichever batches are done
+            done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                debug_print("Update population")
+                for gene, cutsize in future.result():
+                    self.cache_cutsize(gene, cutsize)
+                    self.replace_worst(gene, cutsize)
+                    
+                    
     def random_population(self):
         '''
         Generate a random initial population
@@ -134,21 +245,23 @@ class Genetics():
             # Convert to gene
             gene = partition_to_gene(partition, self.configs["cells"])
             # Add to population
-            self.population.append(gene)
+            self.add_gene(gene)
             
             
     def match_cutsize(self):
         '''
         Calculate cut size for each member in the population
         '''
-        self.current_cutsize = self.configs["cells"]
+        # Cut size can be at most the number of nets
+        self.current_cutsize = len(self.nets)
         
-        for gene in self.population:
-            # Convert to partition
-            partition = gene_to_partition(gene)
-            # Calculate cut size
-            cutsize = cut_size(partition, self.nets)
+        # Count the cells on each side of every net for the whole population at once
+        counts = self.kernel.right_counts(genes_to_sides(self.population, self.configs["cells"]))
+        
+        for gene, right in zip(self.population, counts):
             # Track cut size
+            self.population_state[gene] = CutState.from_counts(self.kernel, gene, right.tolist())
+            cutsize = self.population_state[gene].cut
             self.population_cutsize[gene] = cutsize
             
             # Track smallest cut size (best solution)
@@ -161,13 +274,13 @@ class Genetics():
         Calculate the fit function to determine probability for each gene
         '''
         self.worst_cutsize = 0
-        self.best_cutsize = self.configs["cells"]
+        self.best_cutsize = len(self.nets)
         
         # Find the higest and the lowest costs
         for gene in self.population_cutsize:
             if self.population_cutsize[gene] < self.best_cutsize:
                 self.best_cutsize = self.population_cutsize[gene]
-            elif self.population_cutsize[gene] > self.worst_cutsize:
+            if self.population_cutsize[gene] > self.worst_cutsize:
                 self.worst_cutsize = self.population_cutsize[gene]
         
         # Track the total fit (to proportionally select a gene)
@@ -185,6 +298,9 @@ class Genetics():
             self.total += fit
             # Track fit
             self.population_fit[gene] = fit
+            
+        # Build the selection wheel (once per generation)
+        self.wheel = RouletteWheel([self.population_fit[gene] for gene in self.population])
                 
         # Update current lowest cut size
         self.current_cutsize = self.best_cutsize
@@ -195,55 +311,41 @@ class Genetics():
         Choose parents randomly
         '''
         
-        # Calculate fitness distribution (normalize)
-        distribution = []
-        for gene in self.population:
-            distribution.append(self.population_fit[gene] / self.total)
-
-        # Randomly select parents
-        parent1 = random.choices(self.population, weights=distribution)[0]
-        parent2 = random.choices(self.population, weights=distribution)[0]
+        # Randomly select 2 different parents
+        parent1, parent2 = self.wheel.draw_pair(
+            lambda slot1, slot2: self.population[slot1] == self.population[slot2],
+            len(self.gene_count)
+        )
         
-        # Check that the parents are different (unless the entire population is identical)
-        if len(set(self.population)) > 1:
-            while parent2 == parent1:
-                parent2 = random.choices(self.population, weights=distribution)[0]
-        
-        return parent1, parent2       
+        return self.population[parent1], self.population[parent2]
         
     
     def crossover(self, parent1, parent2):
         '''
         Create child
         '''
+        n_cells = self.configs["cells"]
+        
         # Choose a random split
-        split = random.randint(1, len(parent1)-1)
+        split = random.randint(1, n_cells-1)
         
-        debug_print("P1: {p1}|{p2}".format(p1=parent1[0:split], p2=parent1[split:]))
-        debug_print("P2: {p1}|{p2}".format(p1=parent2[0:split], p2=parent2[split:]))
+        # Masks for the cells before and after the split
+        low = (1 << split) - 1
+        high = ((1 << n_cells) - 1) ^ low
         
-        # Create first part of the children
-        child1 = parent1[0:split]
-        child2 = parent1[0:split]
+        if debug:
+            debug_print("P1: {p1}|{p2}".format(p1=gene_to_string(parent1, n_cells)[0:split], p2=gene_to_string(parent1, n_cells)[split:]))
+            debug_print("P2: {p1}|{p2}".format(p1=gene_to_string(parent2, n_cells)[0:split], p2=gene_to_string(parent2, n_cells)[split:]))
         
         # First child copies from parent 2
-        child1 += parent2[split:]
+        child1 = (parent1 & low) | (parent2 & high)
         
         # Second child copies inverse of parent 2
-        for bit in parent2[split:]:
-            if bit == "0":
-                child2 += "1"
-            elif bit == "1":
-                child2 += "0"
-            else:
-                raise Exception
-                
-        debug_print("C1: {p1}|{p2}".format(p1=child1[0:split], p2=child1[split:]))
-        debug_print("C2: {p1}|{p2}".format(p1=child2[0:split], p2=child2[split:]))
+        child2 = (parent1 & low) | (~parent2 & high)
                 
-        # Double check children are correct
-        assert len(child1) == len(child2)
-        assert len(child1) == len(parent1)
+        if debug:
+            debug_print("C1: {p1}|{p2}".format(p1=gene_to_string(child1, n_cells)[0:split], p2=gene_to_string(child1, n_cells)[split:]))
+            debug_print("C2: {p1}|{p2}".format(p1=gene_to_string(child2, n_cells)[0:split], p2=gene_to_string(child2, n_cells)[split:]))
         
         return child1, child2
         
@@ -252,120 +354,96 @@ class Genetics():
         '''
         Apply mutations
         '''
+        n_cells = self.configs["cells"]
         
         # Randomly choose how many mutations to perform (based on mutation factor)
-        m = random.randint(0, int(len(child1)/mutation_factor))
+        m = random.randint(0, int(n_cells/mutation_factor))
         
         debug_print("{} mutations.".format(m))
-        debug_print("C1: {}".format(child1))
-        
-        # Apply mutations to child 1
-        child1 = list(child1)
-        
-        # Perform m mutations
-        for i in range(m):
-            # Randomly choose a pin to move
-            bit = random.randint(0, len(child1))
-            if child1[i] == "0":
-                child1[i] = "1"
-            elif child1[i] == "1":
-                child1[i] = "0"
-            else:
-                raise Exception
-        
-        debug_print("C1: {}".format(child1))
-        
-        # Make sure child is legal (balanced partition)
-        child1 = self.make_legal(child1)
-        debug_print("C1: {}".format(child1))
-        
-        debug_print("C2: {}".format(child2))
-                
-        # Apply mutations to child 2
-        child2 = list(child2)
-        
-        # Perform m mutations
-        for i in range(m):
-            # Randomly choose a pin to move
-            bit = random.randint(0, len(child2))
-            if child2[i] == "0":
-                child2[i] = "1"
-            elif child2[i] == "1":
-                child2[i] = "0"
-            else:
-                raise Exception
-                
-        debug_print("C2: {}".format(child2))
         
-        # Make sure child is legal (balanced partition)
-        child2 = self.make_legal(child2) 
-        debug_print("C2: {}".format(child2))
+        # Apply mutations to each child
+        children = []
+        for child in (child1, child2):
+            if debug:
+                debug_print("C : {}".format(gene_to_string(child, n_cells)))
+            
+            # Randomly choose m pins to move and flip them
+            mask = 0
+            for bit in random.sample(range(n_cells), m):
+                mask |= 1 << bit
+            child ^= mask
+            
+            if debug:
+                debug_print("C : {}".format(gene_to_string(child, n_cells)))
+            
+            children.append(child)
                 
-        return child1, child2
+        return children[0], children[1]
                 
         
-    def make_legal(self, child):
+    def make_legal(self, child, parents):
         '''
         Make sure child is a balanced partition
+        Moves the cells on the larger side that cost the least (highest gain) all at once
+        Input:
+            child - (gene, cutsize, state) of the child (from score_child)
+            parents - genes in the population to start from
+        Output:
+            child - (gene, cutsize, state) of the legal child
         '''
         debug_print("Confirm legality.")
-        
-        # Count nodes in left partition and right partition
-        left = child.count("0")
-        right = child.count("1")
-        
-        # Choose a random starting index
-        start = random.randint(0, len(child))
+        gene, cutsize, state = child
         
         # If already balanced, skip
-        if abs(left - right) <= 1:
-            pass
-            
-        # Othersise if more on left than right
-        elif left > right:
-            count = 0
-            
-            # Convert left nodes into right nodes starting from starting index
-            while True:
-                # Convert
-                if child[start % len(child)] == "0":
-                    child[start % len(child)] = "1"
-                    count += 1
-                
-                # Check if enough have been converted
-                if count == int((left - right) / 2):
-                    break
-                start += 1
-                
-        # Othersise if more on right than left
-        elif right > left:
-            count = 0
-            
-            # Convert left nodes into right nodes starting from starting index
-            while True:
-                # Convert
-                if child[start % len(child)] == "1":
-                    child[start % len(child)] = "0"
-                    count += 1
-                
-                # Check if enough have been converted
-                if count == int((right - left) / 2):
-                    break
-                start += 1
+        if abs(2 * count_right(gene) - self.configs["cells"]) <= self.max_imbalance:
+            return child
             
-        else:
-            raise Exception
+        # Otherwise convert enough nodes on the larger side
+        if state is None:
+            state = self.child_state(gene, parents)
+        state = repair_balance(state, self.max_imbalance)
+        
+        self.cache_cutsize(state.gene, state.cut)
+        return state.gene, state.cut, state
+        
+        
+    def refine_child(self, child, parents):
+        '''
+        Improve a child with FM refinement
+        Input:
+            child - (gene, cutsize, state) of the child
+            parents - genes in the population to start from
+        Output:
+            child - (gene, cutsize, state) of the refined child
+        '''
+        gene, cutsize, state = child
+        if state is None:
+            state = self.child_state(gene, parents)
+        state = fm_refine(state, self.max_imbalance)
         
-        # Convert child back to string
-        child = "".join(child)
-        return child
+        self.cache_cutsize(state.gene, state.cut)
+        return state.gene, state.cut, state
         
         
     def replace_population(self, child1, child2):
         '''
         Replace the weakest members with newly generated children
+        Input:
+            child1, child2 - (gene, cutsize, state) of each child
+        '''
+        self.replace_worst(*child1)
+        self.replace_worst(*child2)
+        
+        
+    def replace_worst(self, child, cutsize, state=None):
+        '''
+        Replace the weakest member with a child
+        Input:
+            child - packed gene
+            cutsize - cut size of the child
+            state - CutState of the child (None if it was scored elsewhere)
         '''
-        worst_cutsize = 0
+        worst_cutsize = -1
         
         # Find the worst gene
         for gene in self.population:
@@ -374,42 +452,158 @@ class Genetics():
                 worst_cutsize = self.population_cutsize[gene]
                 
         # Remove worst gene
-        debug_print("Remove worst gene: {}".format(worst_gene))
-        self.population.remove(worst_gene)
-        if worst_gene not in self.population:
-            del self.population_cutsize[worst_gene]
+        if debug:
+            debug_print("Remove worst gene: {}".format(gene_to_string(worst_gene, self.configs["cells"])))
+        self.remove_gene(worst_gene)
         
         # Add child gene
-        debug_print("Add child gene: {}".format(child1))
-        self.population.append(child1)
-        child1_partition = gene_to_partition(child1)
+        if debug:
+            debug_print("Add child gene: {}".format(gene_to_string(child, self.configs["cells"])))
+        self.add_gene(child)
         
-        # Calculate cut size of child
-        child1_cutsize = cut_size(child1_partition, self.nets)
-        self.population_cutsize[child1] = child1_cutsize
+        # Track cut size of child
+        if state is not None:
+            self.population_state[child] = state
+        self.population_cutsize[child] = cutsize
         
-        # Repeat for child 2
-        worst_cutsize = 0
-        # Find the worst gene
-        for gene in self.population:
-            if self.population_cutsize[gene] > worst_cutsize:
-                worst_gene = gene
-                worst_cutsize = self.population_cutsize[gene]
-                
-        # Remove worst gene
-        debug_print("Remove worst gene: {}".format(worst_gene))
-        self.population.remove(worst_gene)
-        if worst_gene not in self.population:
-            del self.population_cutsize[worst_gene]
         
-        # Add child gene
-        debug_print("Add child gene: {}".format(child2))
-        self.population.append(child2)
-        child2_partition = gene_to_partition(child2)
+    def score_child(self, child, parents):
+        '''
+        Find the cut size of a child, from the fitness cache if the same gene (or its complement) was seen before
+        Input:
+            child - packed gene
+            parents - genes in the population to start from
+        Output:
+            child - (gene, cutsize, state), the CutState is None when the cut size came from the cache
+        '''
+        cutsize = self.cached_cutsize(child)
+        if cutsize is not None:
+            return child, cutsize, None
+            
+        state = self.child_state(child, parents)
+        self.cache_cutsize(child, state.cut)
+        return child, state.cut, state
+        
+        
+    def cached_cutsize(self, gene):
+        '''
+        Look up the cut size of a gene in the fitness cache (None if it is not there)
+        '''
+        self.cache_lookups += 1
+        key = canonical_gene(gene, self.configs["cells"])
+        
+        cutsize = self.fitness_cache.get(key)
+        if cutsize is not None:
+            self.cache_hits += 1
+            self.fitness_cache.move_to_end(key)
+            
+        return cutsize
+        
+        
+    def cache_cutsize(self, gene, cutsize):
+        '''
+        Add the cut size of a gene to the fitness cache (evicting the least recently used)
+        Only cut sizes are kept, per-net counts are kept for members of the population only
+        '''
+        if fitness_cache_size <= 0:
+            return
+        
+        key = canonical_gene(gene, self.configs["cells"])
+        self.fitness_cache[key] = cutsize
+        self.fitness_cache.move_to_end(key)
+        
+        if len(self.fitness_cache) > fitness_cache_size:
+            self.fitness_cache.popitem(last=False)
+            
+            
+    def cache_hit_rate(self):
+        '''
+        Fraction of scored children found in the fitness cache
+        '''
+        if self.cache_lookups == 0:
+            return 0.0
+        return self.cache_hits / self.cache_lookups
+        
+        
+    def child_state(self, child, parents):
+        '''
+        Find the per-net side counts and cut size of a child
+        Input:
+            child - packed gene
+            parents - genes in the population to start from
+        Output:
+            state - CutState of the child
+        '''
+        full = (1 << self.configs["cells"]) - 1
+        
+        # Find the parent (or complement of a parent) that differs in the fewest cells
+        closest = None
+        for parent in parents:
+            for complement in (False, True):
+                flips = child ^ parent ^ (full if complement else 0)
+                if closest is None or count_right(flips) < count_right(closest[2]):
+                    closest = (parent, complement, flips)
+                    
+        # Start over if there is nothing to start from
+        if closest is None or closest[0] not in self.gene_count:
+            return CutState.from_gene(self.kernel, child)
+            
+        # Members scored from the fitness cache get their per-net counts when they are first needed
+        parent, complement, flips = closest
+        if parent not in self.population_state:
+            self.population_state[parent] = CutState.from_gene(self.kernel, parent)
+            
+        # Flip the cells that differ from the parent
+        state = self.population_state[parent].copy()
+        if complement:
+            state.complement()
+        state.flip_all(flips)
+        
+        return state
+        
+        
+    def add_gene(self, gene):
+        '''
+        Add a gene to the population and count identical genes
+        '''
+        self.population.append(gene)
+        self.gene_count[gene] = self.gene_count.get(gene, 0) + 1
         
-        # Calculate cut size of child
-        child2_cutsize = cut_size(child2_partition, self.nets)
-        self.population_cutsize[child2] = child2_cutsize
+        
+    def remove_gene(self, gene):
+        '''
+        Remove a gene from the population (and its cut size once no copies are left)
+        '''
+        self.population.remove(gene)
+        self.gene_count[gene] -= 1
+        if self.gene_count[gene] == 0:
+            del self.gene_count[gene]
+            del self.population_cutsize[gene]
+            self.population_state.pop(gene, None)
+            
+            
+    def search(self):
+        '''
+        Evolve the population and keep the best partition (without any output)
+        '''
+        
+        # Evolve the population (refining children on evaluator processes in pipelined mode)
+        # Worker processes of other pools evolve on their own, since an evaluator pool
+        # started inside a pool worker can outlive it and hang the outer pool at shutdown
+        if pipeline_workers > 0 and fm_refinement and multiprocessing.parent_process() is None:
+            self.evolve_pipelined(n_iterations)
+        else:
+            self.evolve(n_iterations)
+            
+        # Choose the best solution in the population
+        self.choose_best_gene()
+        
+        # Improve the best solution with a local search
+        if fm_refinement:
+            self.refine_best_gene()
+        
+        # Double check that the partition is legal
+        assert(check_legality(self.partition, self.configs["cells"]))
         
         
     def choose_best_gene(self):
@@ -422,19 +616,49 @@ class Genetics():
         for gene in self.population:
             # Look for any gene with the same or lower cut size than previous best
             if self.population_cutsize[gene] <= self.current_cutsize:
-                self.partition = gene_to_partition(gene)
+                self.best_gene = gene
                 self.current_cutsize = self.population_cutsize[gene]
                 found = True
                 
         # Must be found
         assert found
+        
+        self.partition = gene_to_partition(self.best_gene, self.configs["cells"])
             
         
+    def load_gene(self, gene, cutsize):
+        '''
+        Use a partition found outside the genetics algorithm as the result
+        '''
+        self.best_gene = gene
+        self.current_cutsize = cutsize
+        self.partition = gene_to_partition(gene, self.configs["cells"])
+        
+        # Double check that the partition is legal
+        assert(check_legality(self.partition, self.configs["cells"]))
+        
+        
+    def refine_best_gene(self):
+        '''
+        Apply FM refinement to the best gene and keep the result if it is better
+        '''
+        state = self.population_state.get(self.best_gene)
+        if state is None:
+            state = CutState.from_gene(self.kernel, self.best_gene)
+        state = fm_refine(state, self.max_imbalance)
+        
+        if state.cut < self.current_cutsize:
+            self.best_gene = state.gene
+            self.partition = gene_to_partition(state.gene, self.configs["cells"])
+            self.current_cutsize = state.cut
+            
+            
     def print_results(self):
         '''
         Print the relevant stats after algorithm is complete
         '''
-        print("\nFinal Cutsize: {}\n".format(self.current_cutsize))
+        print("\nFinal Cutsize: {}".format(self.current_cutsize))
+        print("Fitness cache hit rate: {r:.1%} ({h}/{l})\n".format(r=self.cache_hit_rate(), h=self.cache_hits, l=self.cache_lookups))
         
         # print("Left: {}".format(self.partition["left"]))
         # print("Right: {}".format(self.partition["right"]))
@@ -449,4 +673,5 @@ class Genetics():
         out_file.write("\tLeft: {}\n".format(self.partition["left"]))
         out_file.write("\tRight: {}\n".format(self.partition["right"]))
         
-        out_file.write("\nFinal Cutsize: {}\n\n".format(self.current_cutsize))
\ No newline at end of file
+        out_file.write("\nFinal Cutsize: {}\n".format(self.current_cutsize))
+        out_file.write("Fitness cache hit rate: {r:.1%} ({h}/{l})\n\n".format(r=self.cache_hit_rate(), h=self.cache_hits, l=self.cache_lookups))
\ No newline at end of file
@@ -0,0 +1,118 @@
+from util import *
+from settings import *
+from genetics import *
+from multilevel import *
+import concurrent.futures
+import random
+
+# k-way partitioning by recursive bisection
+# Every part is split in two with the genetics partitioner (or the multilevel
+# partitioner), and the parts on each level are independent so they are split
+# in parallel on a process pool
+
+
+def sub_circuit(cells, nets):
+    '''
+    Restrict a circuit to a subset of its cells
+    Input:
+        cells - cells to keep
+        nets - list of nets and the cells for each
+    Output:
+        sub_nets - nets with at least 2 of the cells, numbered by position in cells
+    '''
+    index = {cell: i for i, cell in enumerate(cells)}
+
+    sub_nets = []
+    for net in nets:
+        sub_net = [index[cell] for cell in net if cell in index]
+        if len(sub_net) > 1:
+            sub_nets.append(sub_net)
+
+    return sub_nets
+
+
+def bisect_cells(cells, sub_nets, seed):
+    '''
+    Split a set of cells in two (runs on a worker process)
+    Input:
+        cells - cells to split
+        sub_nets - nets between the cells (numbered by position in cells)
+        seed - random seed for the worker
+    Output:
+        left, right - cells on each side
+    '''
+    random.seed(seed)
+    configs = {"cells": len(cells), "nets": len(sub_nets)}
+
+    if multilevel:
+        gene, cutsize = multilevel_partition(configs, sub_nets)
+    else:
+        genetics = Genetics(None)
+        try:
+            genetics.setup(configs, sub_nets)
+            genetics.initialize_partition()
+            
+            # Search without the printout (the cut size of a sub-part is not the k-way cut size)
+            genetics.search()
+            gene = genetics.best_gene
+        finally:
+            genetics.close()
+
+    left = [cell for i, cell in enumerate(cells) if not gene >> i & 1]
+    right = [cell for i, cell in enumerate(cells) if gene >> i & 1]
+    return left, right
+
+
+def kway_cut_size(parts, nets):
+    '''
+    Count the nets with cells in more than one part
+    '''
+    part_of = {}
+    for p, part in enumerate(parts):
+        for cell in part:
+            part_of[cell] = p
+
+    return sum(1 for net in nets if len(set(part_of[cell] for cell in net)) > 1)
+
+
+def kway_partition(configs, nets, k, workers=None):
+    '''
+    Partition a circuit into k balanced parts by recursive bisection
+    Input:
+        configs - circuit configurations
+        nets - list of nets and the cells for each
+        k - number of parts (a power of 2)
+        workers - number of worker processes (None for one per CPU)
+    Output:
+        parts - list of the cells in each part
+        cutsize - number of nets with cells in more than one part
+    '''
+    assert k >= 2 and k & (k - 1) == 0, "Number of parts must be a power of 2"
+    assert configs["cells"] >= k, "Need at least as many cells as parts"
+
+    parts = [list(range(configs["cells"]))]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        # Split every part on a level at the same time
+        while len(parts) < k:
+            futures = [
+                pool.submit(bisect_cells, part, sub_circuit(part, nets), random.getrandbits(32))
+                for part in parts
+            ]
+
+            parts = [half for future in futures for half in future.result()]
+            debug_print("Split into {k} parts: {s}".format(k=len(parts), s=[len(part) for part in parts]))
+
+    return parts, kway_cut_size(parts, nets)
+
+
+def write_kway_output(out_file, parts, cutsize):
+    '''
+    Write a k-way partition to an output file
+    '''
+    out_file.write("\nFinal Partition ({} parts)\n".format(len(parts)))
+    for p, part in enumerate(parts):
+        out_file.write("\tPart {p} ({n} cells): {c}\n".format(p=p, n=len(part), c=sorted(part)))
+
+    out_file.write("\nPart sizes: {}\n".format([len(part) for part in parts]))
+    out_file.write("Final Cutsize: {}\n\n".format(cutsize))
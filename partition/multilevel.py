@@ -0,0 +1,182 @@
+from util import *
+from settings import *
+from cutsize import *
+from fm import *
+from genetics import *
+import math
+import random
+import numpy as np
+
+# Multilevel bipartitioning
+# The circuit is coarsened by heavy-edge matching until it is small, the
+# genetics partitioner runs on the coarsest circuit, and the result is
+# projected back one level at a time with rebalancing and FM refinement
+
+# Nets with more cells than this are ignored when choosing matches
+# (they connect almost nothing strongly and are expensive to scan)
+max_matching_net = 64
+
+
+def coarsen(n_cells, nets, weights, max_weight):
+    '''
+    Merge pairs of connected cells with heavy-edge matching
+    Each unmatched cell (in random order) is merged with the unmatched neighbour
+    it shares the most weight with, where a net of n cells adds 1/(n-1)
+    Input:
+        n_cells - number of cells
+        nets - list of nets and the cells for each
+        weights - size of each cell
+        max_weight - largest size of a merged cell
+    Output:
+        cluster - coarse cell of each cell
+        n_coarse - number of coarse cells
+        coarse_nets - nets of the coarse circuit (without duplicate cells or single cell nets)
+        coarse_weights - size of each coarse cell
+    '''
+
+    # Nets touching each cell
+    cell_nets = [[] for i in range(n_cells)]
+    for n, net in enumerate(nets):
+        if 1 < len(net) <= max_matching_net:
+            for cell in net:
+                cell_nets[cell].append(n)
+
+    cluster = [-1] * n_cells
+    n_coarse = 0
+    lonely = []
+
+    order = list(range(n_cells))
+    random.shuffle(order)
+    for cell in order:
+        if cluster[cell] != -1:
+            continue
+
+        # Connection weight to each unmatched neighbour that fits with the cell
+        scores = {}
+        for n in cell_nets[cell]:
+            edge = 1.0 / (len(nets[n]) - 1)
+            for other in nets[n]:
+                if other != cell and cluster[other] == -1 and weights[cell] + weights[other] <= max_weight:
+                    scores[other] = scores.get(other, 0) + edge
+
+        cluster[cell] = n_coarse
+        if scores:
+            cluster[max(scores, key=scores.get)] = n_coarse
+        else:
+            lonely.append(cell)
+        n_coarse += 1
+
+    # Cells left without a neighbour are paired with each other so that they still shrink
+    # (nothing can join them later, so they are still alone in their cluster)
+    for first, second in zip(lonely[0::2], lonely[1::2]):
+        if weights[first] + weights[second] <= max_weight:
+            cluster[second] = cluster[first]
+
+    # Renumber the coarse cells without gaps
+    index = {}
+    for cell in range(n_cells):
+        cluster[cell] = index.setdefault(cluster[cell], len(index))
+    n_coarse = len(index)
+
+    # Coarse cell sizes
+    coarse_weights = [0] * n_coarse
+    for cell in range(n_cells):
+        coarse_weights[cluster[cell]] += weights[cell]
+
+    # Coarse nets (nets inside one coarse cell can never be cut)
+    coarse_nets = []
+    for net in nets:
+        cells = sorted(set(cluster[cell] for cell in net))
+        if len(cells) > 1:
+            coarse_nets.append(cells)
+
+    return cluster, n_coarse, coarse_nets, coarse_weights
+
+
+def project(gene, cluster, n_coarse):
+    '''
+    Give every cell the side of its coarse cell
+    Input:
+        gene - packed gene of the coarse circuit
+        cluster - coarse cell of each cell
+        n_coarse - number of coarse cells
+    Output:
+        gene - packed gene of the fine circuit
+    '''
+    sides = genes_to_sides([gene], n_coarse)[0][np.asarray(cluster, dtype=np.intp)]
+    return int.from_bytes(np.packbits(sides, bitorder="little").tobytes(), "little")
+
+
+def refine_level(n_cells, nets, weights, gene):
+    '''
+    Balance a partition of one level by cell size and improve its cut
+    Input:
+        n_cells - number of cells of the level
+        nets - list of nets and the cells for each
+        weights - size of each cell
+        gene - packed gene of the partition
+    Output:
+        state - CutState of the balanced and refined partition
+    '''
+
+    # Each level can be off by up to one of its cells (within the balance tolerance on the original circuit)
+    max_imbalance = max(max(weights), allowed_imbalance(n_cells))
+
+    state = CutState.from_gene(CutSizeKernel(n_cells, nets), gene)
+    rebalance(state, max_imbalance, weights)
+    return fm_refine(state, max_imbalance, weights=weights)
+
+
+def multilevel_partition(configs, nets):
+    '''
+    Partition a circuit with the multilevel scheme
+    Input:
+        configs - circuit configurations
+        nets - list of nets and the cells for each
+    Output:
+        gene - packed gene of the best partition found
+        cutsize - cut size of the partition
+    '''
+    n_cells = configs["cells"]
+    weights = [1] * n_cells
+
+    # Coarse cells are kept small enough that the coarsest circuit can still be balanced
+    max_weight = max(2, math.ceil(1.5 * n_cells / coarsest_cells))
+
+    # Coarsen until the circuit is small or stops shrinking
+    levels = []
+    while n_cells > coarsest_cells:
+        cluster, n_coarse, coarse_nets, coarse_weights = coarsen(n_cells, nets, weights, max_weight)
+        if n_coarse > coarsening_limit * n_cells:
+            break
+
+        debug_print("Coarsened {n} cells to {c} cells ({k} nets)".format(n=n_cells, c=n_coarse, k=len(coarse_nets)))
+        levels.append((n_cells, nets, weights, cluster))
+        n_cells, nets, weights = n_coarse, coarse_nets, coarse_weights
+
+    # Partition the coarsest circuit with the genetics partitioner (without its printout)
+    genetics = Genetics(None)
+    genetics.setup({"cells": n_cells, "nets": len(nets)}, nets)
+    genetics.initialize_partition()
+    genetics.evolve(n_iterations)
+    genetics.choose_best_gene()
+
+    # The genetics partitioner balances the number of cells, so balance the coarse cells by size
+    state = refine_level(n_cells, nets, weights, genetics.best_gene)
+    gene = state.gene
+    cutsize = state.cut
+    debug_print("Coarsest {n} cells, cut size = {c}".format(n=n_cells, c=cutsize))
+
+    # Project back one level at a time
+    for fine_cells, fine_nets, fine_weights, cluster in reversed(levels):
+        gene = project(gene, cluster, n_cells)
+        n_cells = fine_cells
+
+        # Repair the balance and improve the cut
+        state = refine_level(n_cells, fine_nets, fine_weights, gene)
+        gene = state.gene
+        cutsize = state.cut
+
+        debug_print("Uncoarsened to {n} cells, cut size = {c}".format(n=n_cells, c=cutsize))
+
+    return gene, cutsize
@@ -0,0 +1,46 @@
+from util import *
+from settings import *
+from cutsize import *
+from fm import *
+from netlist_parser import *
+
+# Evaluator processes for the pipelined (asynchronous steady-state) genetics algorithm
+# Children are scored and repaired incrementally in the main process, and only
+# the FM refinement (which costs far more than sending a gene) runs here, on
+# batches of children so that each task is worth the round trip
+
+
+# Kernel of the circuit on each evaluator process
+evaluator_kernel = None
+evaluator_max_imbalance = None
+
+
+def init_evaluator(configs, nets):
+    '''
+    Set up an evaluator process with the circuit
+    Input:
+        configs - circuit configurations
+        nets - list of nets and the cells for each (None to load the cached arrays of the file in configs)
+    '''
+    global evaluator_kernel, evaluator_max_imbalance
+    if nets is None:
+        evaluator_kernel = CutSizeKernel.from_netlist(load_netlist(configs["filename"]))
+    else:
+        evaluator_kernel = CutSizeKernel(configs["cells"], nets)
+    evaluator_max_imbalance = allowed_imbalance(configs["cells"])
+
+
+def refine_children(children):
+    '''
+    Refine a batch of children on an evaluator process
+    Input:
+        children - packed genes of legal children
+    Output:
+        refined - (gene, cutsize) of each refined child
+    '''
+    refined = []
+    for child in children:
+        state = fm_refine(CutState.from_gene(evaluator_kernel, child), evaluator_max_imbalance)
+        refined.append((state.gene, state.cut))
+
+    return refined
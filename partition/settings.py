@@ -7,6 +7,9 @@ single_circuit = True
 # Circuit to run (if running 1 circuit only)
 circuit_name = "cm150a"
 
+# Directory for the binary cache of parsed netlists (None to always parse the text file)
+netlist_cache_dir = "./cache"
+
 # Show GUI
 gui = True
 
@@ -18,6 +21,44 @@ n_iterations = 10000
 population_size = 50
 mutation_factor = 10
 
+# Largest fraction of the cells allowed on one side (0.5 for an even split within one cell, 0.55 for 45/55)
+balance_tolerance = 0.5
+
+# Number of scored genes kept for the whole run (a gene and its complement share an entry, 0 to disable)
+fitness_cache_size = 10000
+
+# Fiduccia-Mattheyses refinement of each child and of the final solution
+fm_refinement = False
+# Largest number of FM passes per refinement
+fm_passes = 4
+
+# Multilevel partitioning (coarsen, partition the coarsest circuit, then refine while uncoarsening)
+multilevel = False
+# Stop coarsening once the circuit has this many cells
+coarsest_cells = 64
+# Stop coarsening when a level keeps more than this fraction of the cells
+coarsening_limit = 0.9
+
+# Number of parts (a power of 2, more than 2 uses recursive bisection)
+k_way = 2
+# Worker processes for k-way partitioning (None for one per CPU)
+kway_workers = None
+
+# Seeds per benchmark and worker processes for the headless benchmark sweep (None for one per CPU)
+sweep_seeds = 1
+sweep_workers = None
+
+# Prove the optimal cut size with branch and bound after the run (small circuits only)
+exact_reference = False
+# Worker processes for branch and bound (None for one per CPU)
+exact_workers = None
+
+# Evaluator processes that refine children for the pipelined genetics algorithm
+# (only used with fm_refinement, 0 to refine children in this process)
+pipeline_workers = 0
+# Children sent to an evaluator at a time
+pipeline_batch_size = 16
+
 # Control whether algorithm stops at iteration limit or time limit
 time_limited = False
 time_limit = 60
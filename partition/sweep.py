@@ -0,0 +1,87 @@
+from util import *
+from settings import *
+from netlist_parser import *
+from genetics import *
+from multilevel import *
+import concurrent.futures
+import json
+import os
+import random
+import time
+
+# Headless benchmark sweep
+# Every benchmark (with each seed) runs on its own worker process, and one JSON
+# record is written per run as soon as it finishes
+
+
+def run_benchmark(benchmark, seed):
+    '''
+    Partition one benchmark without the GUI (runs on a worker process)
+    Input:
+        benchmark - name of the file in benchmarks/ (without .txt)
+        seed - random seed for the run
+    Output:
+        record - dictionary of the results
+    '''
+    random.seed(seed)
+    configs, nets = parse_file("./benchmarks/{}.txt".format(benchmark))
+
+    start_time = time.time()
+    if multilevel:
+        gene, cutsize = multilevel_partition(configs, nets)
+    else:
+        genetics = Genetics(None)
+        try:
+            genetics.setup(configs, nets)
+            genetics.initialize_partition()
+            
+            # Search without the printout (the main process reports from the records)
+            genetics.search()
+            gene, cutsize = genetics.best_gene, genetics.current_cutsize
+        finally:
+            genetics.close()
+    wall_time = time.time() - start_time
+
+    partition = gene_to_partition(gene, configs["cells"])
+
+    return {
+        "circuit": benchmark,
+        "seed": seed,
+        "cells": configs["cells"],
+        "nets": configs["nets"],
+        "cutsize": cutsize,
+        "iterations": n_iterations,
+        "multilevel": multilevel,
+        "wall_time": round(wall_time, 3),
+        "legal": check_legality(partition, configs["cells"]),
+    }
+
+
+def run_sweep(out_file_name, seeds=1, workers=None):
+    '''
+    Partition every benchmark on a process pool
+    Input:
+        out_file_name - file to write one JSON record per line to
+        seeds - number of seeds per benchmark
+        workers - number of worker processes (None for one per CPU)
+    Output:
+        records - results of every run
+    '''
+    benchmarks = sorted(f.replace(".txt", "") for f in os.listdir("benchmarks") if ".txt" in f)
+    runs = [(benchmark, seed) for benchmark in benchmarks for seed in range(seeds)]
+
+    records = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_benchmark, benchmark, seed) for benchmark, seed in runs]
+
+        # Record each run as it finishes
+        for future in concurrent.futures.as_completed(futures):
+            record = future.result()
+            records.append(record)
+            debug_print("{circuit} (seed {seed}): cut size = {cutsize}, {wall_time}s".format(**record))
+
+            out_file = open(out_file_name, "a+")
+            out_file.write(json.dumps(record) + "\n")
+            out_file.close()
+
+    return records
@@ -1,8 +1,15 @@
 from settings import *
+from cutsize import *
+import os
+import sys
 import random
+import numpy as np
 import matplotlib
 from matplotlib import cm
 
+# Modules shared by the placement and partition packages (e.g. the netlist parser)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+
 def debug_print(content):
     '''
     Special print statement (prints only in debug mode, otherwise logs to file)
@@ -152,31 +159,26 @@ def draw_line(orig, dest, c, grid, colour="gray", tag="", size=20):
     )
 
 
-def cut_size(partition, nets):
+def cut_size(partition, nets, kernel=None):
     '''
     Calculate the cut size
+    Input:
+        partition - dictionary tracking which partition each cell is in
+        nets - list of nets and the cells for each
+        kernel - CutSizeKernel for the nets (built here if not given)
+    Output:
+        cut_size - number of nets with cells in both partitions
     '''
-    # Initialize to 0
-    cut_size = 0
+    if kernel is None:
+        cells = [cell for net in nets for cell in net] + list(partition["left"]) + list(partition["right"])
+        kernel = CutSizeKernel(max(cells, default=-1) + 1, nets)
     
-    # Iterate through each net
-    for net in nets:
-        left = False
-        right = False
-        
-        for node in net:
-            node_left = node in partition["left"]
-            node_right = node in partition["right"]
-            
-            # Add to cut size if any nodes cross the partition
-            if left and node_right or right and node_left:
-                cut_size += 1
-                break
-            
-            left = left or node_left
-            right = right or node_right
-            
-    return cut_size
+    # Side of each cell (unassigned cells are on neither side)
+    sides = np.full(kernel.n_cells, -1, dtype=np.int8)
+    sides[list(partition["left"])] = 0
+    sides[list(partition["right"])] = 1
+    
+    return int(kernel.cut_size(sides))
     
     
 def write_cutsize(c, cut_size):
@@ -196,12 +198,19 @@ def write_cutsize(c, cut_size):
     )
     
     
+def allowed_imbalance(n_cells):
+    '''
+    Largest allowed difference between the side sizes (from balance_tolerance, at least 1)
+    '''
+    return max(1, int((2 * balance_tolerance - 1) * n_cells))
+    
+    
 def check_legality(partition, n_cells):
     '''
     Check whether the partition is legal
     '''
-    # Check for even split
-    if not abs(len(partition["left"]) - len(partition["right"])) <= 1:
+    # Check for even split (within the balance tolerance)
+    if not abs(len(partition["left"]) - len(partition["right"])) <= allowed_imbalance(n_cells):
         return False
     # Check that all nodes have been assigned
     if not len(partition["left"]) + len(partition["right"]) == n_cells:
@@ -304,26 +313,27 @@ def partition_to_gene(partition, n_cells):
     Input:
         partition - tracks which partition each cell is in 
     Output:
-        gene - a vector of partitions
+        gene - packed bits, bit i is 0 if cell i is on the left and 1 if on the right
     '''
     
-    gene = ""
+    gene = 0
     for i in range(n_cells):
         if i in partition["left"]:
-            gene += "0"
+            pass
         elif i in partition["right"]:
-            gene += "1"
+            gene |= 1 << i
         else:
             raise Exception
             
     return gene
     
     
-def gene_to_partition(gene):
+def gene_to_partition(gene, n_cells):
     '''
     Convert gene representation to original partition data type
     Input:
-        gene - a vector of partitions
+        gene - packed bits, bit i is 0 if cell i is on the left and 1 if on the right
+        n_cells - number of cells
     Output:
         partition - dictionary tracking which partition each cell is in
     '''
@@ -331,13 +341,34 @@ def gene_to_partition(gene):
     partition["left"] = []
     partition["right"] = []
     
-    for i, cell in enumerate(gene):
-        if cell == "0":
-            partition["left"].append(i)
-        elif cell == "1":
+    for i in range(n_cells):
+        if gene >> i & 1:
             partition["right"].append(i)
         else:
-            raise Exception
+            partition["left"].append(i)
             
     return partition
-        
\ No newline at end of file
+    
+    
+def gene_to_string(gene, n_cells):
+    '''
+    Format a gene as a string of "0"/"1" per cell (cell 0 first) for printing
+    '''
+    return format(gene, "0{}b".format(n_cells))[::-1]
+    
+    
+def canonical_gene(gene, n_cells):
+    '''
+    Canonical form of a gene (a gene and its complement are the same partition)
+    Cell 0 is always on the left
+    '''
+    if gene & 1:
+        return gene ^ ((1 << n_cells) - 1)
+    return gene
+    
+    
+def count_right(gene):
+    '''
+    Count the cells on the right side of a gene
+    '''
+    return gene.bit_count()
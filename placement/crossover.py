@@ -0,0 +1,186 @@
+from util import *
+from settings import *
+from sites import *
+import random
+
+# Crossover operators for placement genes
+# Each operator takes two parents (lists of cell locations) and the number of
+# locations on the grid, and returns a legal child (no repeated locations)
+
+
+def single_point_crossover(parent1, parent2, n_sites):
+    '''
+    Copy parent 1 up to a random split and parent 2 after it
+    Locations that are already taken are copied from parent 1, or chosen randomly
+    '''
+
+    # Choose a random split
+    split = random.randint(1, len(parent1)-1)
+
+    if debug:
+        debug_print("P1: {p1}|{p2}".format(p1=parent1[0:split], p2=parent1[split:]))
+        debug_print("P2: {p1}|{p2}".format(p1=parent2[0:split], p2=parent2[split:]))
+
+    # Create first part of the child
+    child = parent1[0:split]
+
+    # Track which locations are still empty
+    sites = FreeSites(n_sites, child)
+
+    # Create second part of the child
+    for i, location in enumerate(parent2[split:]):
+
+        # Copy from parent 2
+        if sites.is_free(location):
+            pass
+
+        # Otherwise copy from parent 1
+        elif sites.is_free(parent1[split+i]):
+            location = parent1[split+i]
+
+        # Otherwise choose randomly from the empty locations
+        else:
+            location = sites.sample()
+
+        sites.take(location)
+        child.append(location)
+
+    if debug:
+        debug_print("C : {c1}|{c2}".format(c1=child[0:split], c2=child[split:]))
+
+    return child
+
+
+def random_segment(n):
+    '''
+    Choose a random segment [start, end) of a gene with n cells
+    '''
+    start, end = sorted(random.sample(range(n + 1), 2))
+    return start, end
+
+
+def pmx_crossover(parent1, parent2, n_sites):
+    '''
+    Partially mapped crossover (PMX)
+    Copy a segment from parent 1 and the rest from parent 2, following the
+    mapping between the parents' segments whenever a location is already taken
+    '''
+    n = len(parent1)
+    start, end = random_segment(n)
+
+    # Cell (position) of each location in parent 1's segment
+    segment = {parent1[i]: i for i in range(start, end)}
+
+    # Create the child from parent 2 with parent 1's segment
+    child = parent2[:]
+    child[start:end] = parent1[start:end]
+
+    # Map any location outside the segment that is already taken
+    for i in list(range(0, start)) + list(range(end, n)):
+        location = parent2[i]
+        while location in segment:
+            location = parent2[segment[location]]
+        child[i] = location
+
+    return child
+
+
+def order_crossover(parent1, parent2, n_sites):
+    '''
+    Order crossover (OX)
+    Copy a segment from parent 1 and fill the remaining cells with parent 2's
+    locations in order (starting after the segment), skipping taken locations
+    '''
+    n = len(parent1)
+    start, end = random_segment(n)
+
+    # Create the child with parent 1's segment
+    child = [None] * n
+    child[start:end] = parent1[start:end]
+    taken = set(parent1[start:end])
+
+    # Parent 2's locations in order from the end of the segment
+    options = [location for location in parent2[end:] + parent2[:end] if location not in taken]
+
+    # Fill the rest of the child from the end of the segment (wrapping around)
+    for i, location in zip(list(range(end, n)) + list(range(0, start)), options):
+        child[i] = location
+
+    return child
+
+
+def cycle_crossover(parent1, parent2, n_sites):
+    '''
+    Cycle crossover (CX)
+    Cells are linked when parent 2's location for one is parent 1's location for
+    the other, each linked group is copied whole, alternating between the parents
+    Since cells do not fill the grid, a group can also be an open chain, starting
+    at a cell whose parent 1 location is not used by parent 2
+    '''
+    n = len(parent1)
+
+    # Cell of each location in parent 1
+    position = {location: i for i, location in enumerate(parent1)}
+    in_parent2 = set(parent2)
+
+    child = [None] * n
+    visited = [False] * n
+    from_parent1 = True
+
+    # Walk open chains from their first cell, then the remaining cycles
+    starts = [i for i in range(n) if parent1[i] not in in_parent2] + list(range(n))
+    for i in starts:
+        if visited[i]:
+            continue
+
+        # Copy the whole group from one parent
+        while i is not None and not visited[i]:
+            visited[i] = True
+            child[i] = parent1[i] if from_parent1 else parent2[i]
+            i = position.get(parent2[i])
+
+        from_parent1 = not from_parent1
+
+    return child
+
+
+def uniform_crossover(parent1, parent2, n_sites):
+    '''
+    Uniform crossover with repair
+    Each cell copies its location from a random parent, cells whose location is
+    already taken try the other parent and otherwise get a random empty location
+    '''
+
+    # Choose a parent for each cell
+    child = [a if random.random() < 0.5 else b for a, b in zip(parent1, parent2)]
+
+    # Track which locations are still empty
+    sites = FreeSites(n_sites)
+
+    # Keep the first cell at each location
+    repairs = []
+    for i, location in enumerate(child):
+        if sites.is_free(location):
+            sites.take(location)
+        else:
+            repairs.append(i)
+
+    # Repair the rest
+    for i in repairs:
+        location = parent1[i] if child[i] == parent2[i] else parent2[i]
+        if not sites.is_free(location):
+            location = sites.sample()
+        sites.take(location)
+        child[i] = location
+
+    return child
+
+
+# Operators that can be selected with crossover_operator
+crossover_operators = {
+    "single_point": single_point_crossover,
+    "pmx": pmx_crossover,
+    "order": order_crossover,
+    "cycle": cycle_crossover,
+    "uniform": uniform_crossover,
+}
@@ -1,5 +1,12 @@
 from util import *
 from settings import *
+from wirelength import *
+from netlist_parser import *
+from population import *
+from sites import *
+from crossover import *
+from selection import *
+from shared import *
 import numpy as np
 import random
 
@@ -15,29 +22,63 @@ class Genetics:
         Initialize class with permanent variables
         '''
         self.c = canvas
+        self.evaluator = None
         
+        # CPU time used by evaluation workers that have been stopped
+        self.evaluator_cpu_time = 0
         
-    def setup(self, configs, nets):
+        
+    def close(self):
+        '''
+        Stop the evaluation workers (if any)
+        '''
+        if self.evaluator is not None:
+            # The population lives in the shared memory, so drop it before freeing the memory
+            self.population = None
+            self.evaluator_cpu_time += self.evaluator.cpu_time()
+            self.evaluator.close()
+            self.evaluator = None
+            
+            
+    def setup(self, configs, nets, seed=None, workers=None):
         '''
         Setup the simulation with the current circuit
+        Input:
+            configs - configurations for the circuit
+            nets - list of nets and the cells for each (None to load them from the file in configs)
+            seed - random seed (None to seed from system entropy)
+            workers - number of evaluation workers (defaults to evaluation_workers)
         '''
+        if workers is None:
+            workers = evaluation_workers
         
         # Circuit parameters
         self.configs = configs
         self.nets = nets
         
+        # Flatten the nets for the cost calculation (using the cached arrays of the file, if there is one)
+        if "filename" in configs:
+            self.engine = WirelengthEngine.from_netlist(configs, load_netlist(configs["filename"]))
+        else:
+            self.engine = WirelengthEngine(configs, nets)
+        
         # Initialize placement map (NaN for empty cells)
         self.placement = np.zeros((configs["cols"], configs["rows"]))
         self.placement[:] = np.NaN
-        random.seed()
+        random.seed(seed)
         
         # Initialize simulation variables
         self.cells = {}
         self.current_cost = 0
         self.cost = {}
         
-        self.population = []
-        self.population_cost = {}
+        # Score the population on worker processes through shared memory
+        self.close()
+        if workers > 1:
+            self.evaluator = SharedEvaluator(configs, self.engine, population_size, workers)
+            self.population = Population(population_size, configs, self.evaluator.population)
+        else:
+            self.population = Population(population_size, configs)
         
         
     def initialize(self):
@@ -45,26 +86,21 @@ class Genetics:
         Generate initial population
         '''
         
-        # Track lowest cost
-        lowest_cost = -1
-        
         # Generate genes for the population
-        for i in range(population_size):
+        genes = [self.random_placement() for i in range(population_size)]
+        
+        # Calculate cost of every net for every random placement at once
+        if self.evaluator is not None:
+            self.population.genes[:] = genes
+            self.evaluator.evaluate()
+            self.population.fill(self.population.genes, self.population.net_costs)
+        else:
+            self.population.fill(genes, self.engine.net_costs(genes))
             
-            # Choose a random placement
-            placement = self.random_placement()
-            
-            # Add to population as string
-            self.population.append(str(placement).replace("[", "").replace("]","").replace(" ", ""))
-            
-            # Calculate cost of random placement and track
-            cost = self.calculate_cost(self.cells)
-            self.population_cost[str(placement).replace("[", "").replace("]","").replace(" ", "")] = cost
-            
-            # Check for best placement with the lowest cost
-            if cost < lowest_cost or lowest_cost == -1:
-                best_placement = placement
-                lowest_cost = cost
+        # Find the best placement with the lowest cost
+        best = self.population.best()
+        best_placement = self.population.genes[best]
+        lowest_cost = int(self.population.costs[best])
                 
         # Use lowest cost placement as the initial best option
         self.cells = gene_to_placement(best_placement, self.configs)
@@ -104,22 +140,15 @@ class Genetics:
         '''
         Initialize circuit with a random placement
         '''
-        # Make a list of possible coordinates
-        possible_placements = [(x, y) for x in range(0, self.configs["cols"]) for y in range(0, self.configs["rows"])]
+        # Choose a distinct location for every cell
+        placement = random.sample(range(0, self.configs["cols"] * self.configs["rows"]), self.configs["cells"])
         
-        # Place every cell
-        for i in range(self.configs["cells"]):
-            (x, y) = random.choice(possible_placements)
-            possible_placements.remove((x, y))
-            # Track which coordinate each cell is at
-            self.cells[i] = (x, y)
+        # Track which coordinate each cell is at
+        self.cells = gene_to_placement(placement, self.configs)
             
         # Double check that all cells have been accounted for
         assert len(self.cells) == self.configs["cells"]
         
-        # Convert placement to a gene
-        placement = placement_to_gene(self.cells, self.configs)
-        
         debug_print("Current Placement:")
         debug_print(placement)
         
@@ -166,11 +195,10 @@ class Genetics:
         '''
         
         # Track the cost for each net
-        for i, net in enumerate(self.nets):
-            self.cost[i] = calculate_half_perimeter(net, cells)
+        self.cost = self.engine.net_costs(placement_to_gene(cells, self.configs))
 
         # Sum up total cost
-        total_cost = sum(self.cost[i] for i in range(self.configs["nets"]))
+        total_cost = int(self.cost.sum())
         debug_print("Total Cost: {}".format(total_cost))
         
         return total_cost
@@ -182,34 +210,8 @@ class Genetics:
         Run the genetics algorithm
         '''
         
-        for i in range(0, n_iterations):
-            
-            # Determine fit function
-            debug_print("Determine fit function.")
-            self.population_fit = {}
-            self.set_fit_function()
-            
-            debug_print(self.population_fit)
-            
-            # Select 2 parents
-            debug_print("Select parents.")
-            parent1, parent2 = self.select_gene()
-            
-            # Create a child
-            debug_print("Generate children. ")
-            child = self.crossover(parent1, parent2)
-            
-            # Apply mutations
-            debug_print("Mutate children.")
-            child = self.mutate(child)
-            
-            # Replace weakest member of population
-            debug_print("Update population")
-            self.replace_population(child)
-            
-            debug_print("New population")
-            for gene in self.population:
-                debug_print("{g}: {c}".format(g=gene, c=self.population_cost[gene]))
+        # Evolve the population
+        self.evolve(n_iterations)
             
         # Choose the best gene out of the current population
         self.choose_best_gene()
@@ -233,43 +235,79 @@ class Genetics:
                 tag="cost"
             )
         
-            
         
-    def set_fit_function(self):
+    def evolve(self, iterations):
         '''
-        Calculate the fit function to determine probability for each gene
+        Run the genetics algorithm for a number of iterations (without updating the results)
         '''
-        self.highest_cost = 0
-        self.lowest_cost = -1
         
-        # Find the higest and the lowest costs
-        for gene in self.population_cost:
-            if self.lowest_cost == -1:
-                self.lowest_cost = self.population_cost[gene]
+        for i in range(0, iterations):
             
-            if self.population_cost[gene] < self.lowest_cost:
-                self.lowest_cost = self.population_cost[gene]
-            elif self.population_cost[gene] > self.highest_cost:
-                self.highest_cost = self.population_cost[gene]
-        
-        # Track the total fit (to proportionally select a gene)
-        self.total = 0                
-        for gene in self.population:
-            # Calculate fit
-            fit = (self.highest_cost - self.population_cost[gene])
-            fit += (self.highest_cost - self.lowest_cost) / 3
+            # Determine fit function
+            debug_print("Determine fit function.")
+            self.set_fit_function()
+            
+            debug_print(self.population_fit)
             
-            # Special edge case when all genes have the same fit
-            if fit == 0:
-                fit = 1
+            # Select 2 parents
+            debug_print("Select parents.")
+            parent1, parent2 = self.select_gene()
             
-            assert fit > 0
+            # Create a child
+            debug_print("Generate children. ")
+            child = self.crossover(self.population.genes[parent1], self.population.genes[parent2])
             
-            # Track total
-            self.total += fit
+            # Apply mutations
+            debug_print("Mutate children.")
+            child = self.mutate(child)
             
-            # Track fit
-            self.population_fit[gene] = fit
+            # Replace weakest member of population
+            debug_print("Update population")
+            self.replace_population(child, parents=(parent1, parent2))
+            
+            if debug:
+                debug_print("New population")
+                for gene, cost in zip(self.population.genes, self.population.costs):
+                    debug_print("{g}: {c}".format(g=gene, c=cost))
+                    
+                    
+    def top_genes(self, k):
+        '''
+        Copy the k best genes in the population
+        '''
+        best = np.argsort(self.population.costs, kind="stable")[:k]
+        return self.population.genes[best].copy()
+        
+        
+    def immigrate(self, genes):
+        '''
+        Replace the weakest members with genes from another population
+        '''
+        if len(genes) > 0:
+            self.replace_population(*genes)
+            
+        
+    def set_fit_function(self):
+        '''
+        Calculate the fit function to determine probability for each gene
+        '''
+        costs = self.population.costs
+        
+        # Find the higest and the lowest costs
+        self.highest_cost = self.population.highest_cost()
+        self.lowest_cost = self.population.lowest_cost()
+        
+        # Calculate fit
+        self.population_fit = (self.highest_cost - costs) + (self.highest_cost - self.lowest_cost) / 3
+        
+        # Special edge case when all genes have the same fit
+        self.population_fit[self.population_fit == 0] = 1
+        
+        assert np.all(self.population_fit > 0)
+        
+        # Track the total fit and build the wheel (to proportionally select a gene)
+        self.total = self.population_fit.sum()
+        self.wheel = RouletteWheel(self.population_fit)
                 
         # Update current lowest cost
         self.current_cost = self.lowest_cost
@@ -278,65 +316,27 @@ class Genetics:
     def select_gene(self):
         '''
         Choose parents randomly
+        Output:
+            parent1, parent2 - population slots of the parents
         '''
         
-        # Calculate fitness distribution (normalize)
-        distribution = []
-        for gene in self.population:
-            distribution.append(self.population_fit[gene] / self.total)
-
-        # Randomly select parents
-        parent1 = random.choices(self.population, weights=distribution)[0]
-        parent2 = random.choices(self.population, weights=distribution)[0]
-        
-        # Check that the parents are different (unless the entire population is identical)
-        if len(set(self.population)) > 1:
-            while parent2 == parent1:
-                parent2 = random.choices(self.population, weights=distribution)[0]
+        # Randomly select 2 different parents
+        parent1, parent2 = self.wheel.draw_pair(self.population.same, self.population.distinct())
         
         return parent1, parent2    
         
     
     def crossover(self, parent1, parent2):
         '''
-        Create child
+        Create child with the selected crossover operator
         '''
         
         # Reformat parent gene representation
-        parent1 = [int(n) for n in parent1.split(",")]
-        parent2 = [int(n) for n in parent2.split(",")]
-        
-        # Choose a random split
-        split = random.randint(1, len(parent1)-1)
-        
-        debug_print("P1: {p1}|{p2}".format(p1=parent1[0:split], p2=parent1[split:]))
-        debug_print("P2: {p1}|{p2}".format(p1=parent2[0:split], p2=parent2[split:]))
+        parent1 = parent1.tolist()
+        parent2 = parent2.tolist()
         
-        # Create first part of the child
-        child = parent1[0:split]
-        
-        # Create second part of the child
-        for i, location in enumerate(parent2[split:]):
-            
-            # Copy from parent 2
-            if location not in child:
-                child.append(location)
-                
-            # Otherwise copy from parent 1
-            elif parent1[split+i] not in child:
-                child.append(parent1[split+i])
-                
-            # Otherwise choose randomly
-            else:
-                # Find out which locations are still empty
-                all_locations = set(range(0, self.configs["cols"] * self.configs["rows"]))
-                options = list(all_locations - set(child))
-                # Choose a location
-                new_location = random.choice(options)
-                child.append(new_location)
-                
-                
-        debug_print("C : {c1}|{c2}".format(c1=child[0:split], c2=child[split:]))
+        # Create the child
+        child = crossover_operators[crossover_operator](parent1, parent2, self.configs["cols"] * self.configs["rows"])
         
         # Double check that the child has no issues (duplicates)
         assert len(child) == len(set(child))
@@ -347,84 +347,103 @@ class Genetics:
     def mutate(self, child):
         '''
         Apply mutations
+        A mutation either moves a cell to an empty location ("move") or exchanges
+        the locations of two cells ("swap"), moves become swaps when the grid is full
         '''
         
         # Randomly choose how many mutations to perform (based on mutation factor)
         m = random.randint(0, int(len(child)/mutation_factor))
         
         debug_print("{} mutations.".format(m))
-        debug_print("C : {}".format(child))
+        if debug:
+            debug_print("C : {}".format(child))
         
-        # Get a list of all possible locations
-        all_locations = set(range(0, self.configs["cols"] * self.configs["rows"]))
+        # Track which locations are still empty
+        if mutation_type == "move":
+            sites = FreeSites(self.configs["cols"] * self.configs["rows"], child)
         
         # Perform m mutations
         for i in range(m):
             # Randomly choose a cell to move
             bit = random.randint(0, len(child)-1)
             
-            # Determine which cells are still empty and choose
-            options = list(all_locations - set(child))
-            new_location = random.choice(options)
-            
-            # Move to new cell
-            child[bit] = new_location
+            # Exchange locations with another cell
+            if mutation_type == "swap" or len(sites) == 0:
+                other = random.randint(0, len(child)-1)
+                child[bit], child[other] = child[other], child[bit]
+                
+            # Move to an empty location
+            else:
+                new_location = sites.sample()
+                sites.take(new_location)
+                sites.release(child[bit])
+                child[bit] = new_location
             
-        debug_print("C : {}".format(child))
+        if debug:
+            debug_print("C : {}".format(child))
         
         # Double check that the child has no issues (duplicates)
         assert len(child) == len(set(child))
         return child
         
         
-    def replace_population(self, child):
+    def replace_population(self, *children, parents=None):
         '''
-        Replace the weakest member with newly generated child
+        Replace the weakest members with newly generated children
+        When parents (population slots) are given, each child is scored from the nets
+        of the parent it differs from in the fewest cells
         '''
-        highest_cost = 0
         
-        # Find the worst gene
-        for gene in self.population:
-            if self.population_cost[gene] > highest_cost:
-                worst_gene = gene
-                highest_cost = self.population_cost[gene]
+        if parents is None:
+            # Calculate cost of every net for all children at once (on the evaluation workers, if any)
+            if self.evaluator is not None:
+                children_net_cost = list(self.evaluator.net_costs(children))
+            else:
+                children_net_cost = list(self.engine.net_costs(children))
+            
+        else:
+            children_net_cost = []
+            for child in children:
+                # Find the closest parent
+                child = np.asarray(child)
+                moved = [np.flatnonzero(child != self.population.genes[parent]) for parent in parents]
+                closest = min(range(len(parents)), key=lambda i: len(moved[i]))
                 
-        # Remove worst gene
-        debug_print("Remove worst gene: {}".format(worst_gene))
-        self.population.remove(worst_gene)
-        if worst_gene not in self.population:
-            del self.population_cost[worst_gene]
+                # Only re-score the nets touching cells that moved away from that parent
+                net_costs = self.population.net_costs[parents[closest]]
+                children_net_cost.append(self.engine.update_net_costs(child, net_costs, moved[closest]))
         
-        debug_print("Add child gene: {}".format(child))
-        
-        # Calculate cost of child
-        child_partition = gene_to_placement(child, self.configs)
-        child_cost = self.calculate_cost(child_partition)
-        
-        # Add child gene
-        child = str(child).replace("[", "").replace("]","").replace(" ", "")
-        self.population.append(child)
-        self.population_cost[child] = child_cost
+        for child, child_net_cost in zip(children, children_net_cost):
+            # Find the worst gene
+            worst = self.population.worst()
+            
+            if debug:
+                debug_print("Remove worst gene: {}".format(self.population.genes[worst]))
+                debug_print("Add child gene: {}".format(child))
+            
+            # Replace worst gene with child gene
+            self.population.replace(worst, child, child_net_cost)
         
         
     def choose_best_gene(self):
         '''
         Choose the best gene from the population
         '''
-        found = False
+        # Look for the gene with the lowest cost
+        best = self.population.best()
         
-        # Search through population
-        for gene in self.population:
-            
-            # Look for any gene with the same or lower cost than previous best
-            if self.population_cost[gene] <= self.current_cost:
-                self.current_cost = self.population_cost[gene]
-                gene = [int(n) for n in gene.split(",")]
-                self.cells = gene_to_placement(gene, self.configs)
-                found = True
-                
-        # Must be found
-        assert found
+        # Must be the same or lower cost than previous best
+        assert self.population.costs[best] <= self.current_cost
+        
+        self.load_gene(self.population.genes[best], self.population.costs[best])
+        
+        
+    def load_gene(self, gene, cost):
+        '''
+        Use a gene as the current placement
+        '''
+        self.current_cost = int(cost)
+        self.cells = gene_to_placement(gene, self.configs)
         
         # Reset all placement
         self.placement[:] = np.NaN
@@ -432,5 +451,3 @@ class Genetics:
         for i in self.cells:
             # Track which cell is in which coordinate
             self.placement[self.cells[i][0], self.cells[i][1]] = i
-        
-        
\ No newline at end of file
@@ -0,0 +1,130 @@
+from util import *
+from settings import *
+from genetics import *
+import multiprocessing
+import queue
+import time
+import numpy as np
+
+
+# Seconds between checks that the islands are still running while waiting for their results
+result_poll_interval = 1
+
+
+def island_seeds(n, seed=None):
+    '''
+    Generate independent random seeds for n islands
+    '''
+    streams = np.random.SeedSequence(seed).spawn(n)
+    return [int(stream.generate_state(1)[0]) for stream in streams]
+
+
+def run_island(island, seed, configs, nets, inbox, outbox, results, deadline):
+    '''
+    Evolve one island and exchange the best genes with its neighbours
+    Input:
+        island - index of the island
+        seed - random seed for the island
+        configs, nets - the circuit (nets is None when the island loads the file in configs)
+        inbox - queue of genes arriving from the previous island
+        outbox - queue of genes leaving for the next island
+        results - queue to send the final (island, gene, cost, iterations, CPU time) back on
+        deadline - time.time() to stop at (None to stop after n_iterations)
+    '''
+
+    # Migrants still in flight when the run ends can be dropped
+    outbox.cancel_join_thread()
+
+    genetics = Genetics(None)
+    genetics.setup(configs, nets, seed=seed)
+    genetics.initialize()
+
+    iterations = 0
+    while True:
+        # Stop at the iteration limit or the time limit
+        if deadline is None and iterations >= n_iterations:
+            break
+        if deadline is not None and time.time() >= deadline:
+            break
+
+        # Evolve until the next migration
+        if deadline is None:
+            epoch = min(migration_interval, n_iterations - iterations)
+        else:
+            epoch = migration_interval
+        genetics.evolve(epoch)
+        iterations += epoch
+
+        # Send the best genes to the next island
+        outbox.put(genetics.top_genes(migration_size))
+
+        # Take in any genes that arrived from the previous island
+        while True:
+            try:
+                genetics.immigrate(inbox.get_nowait())
+            except queue.Empty:
+                break
+
+        debug_print("Island {i}: {n} iterations, cost = {c}".format(i=island, n=iterations, c=genetics.population.lowest_cost()))
+
+    # Report the best gene on this island (and the CPU time of the island and its evaluation workers)
+    genetics.set_fit_function()
+    genetics.choose_best_gene()
+    best = genetics.population.best()
+    gene = genetics.population.genes[best].copy()
+    genetics.close()
+    results.put((island, gene, genetics.current_cost, iterations, time.process_time() + genetics.evaluator_cpu_time))
+
+
+def run_islands(configs, nets, n_islands, seed=None, deadline=None):
+    '''
+    Run independent populations on separate processes with migration in a ring
+    Input:
+        configs, nets - the circuit
+        n_islands - number of populations (one process each)
+        seed - base random seed (None to seed from system entropy)
+        deadline - time.time() to stop at (None to stop after n_iterations)
+    Output:
+        gene - best gene found on any island
+        cost - cost of the best gene
+        island_costs - final cost of each island
+        cpu_time - CPU time used by the island processes
+    '''
+
+    # Island i receives from queue i and sends to queue i+1
+    queues = [multiprocessing.Queue() for i in range(n_islands)]
+    results = multiprocessing.Queue()
+
+    processes = []
+    for island, island_seed in enumerate(island_seeds(n_islands, seed)):
+        process = multiprocessing.Process(
+            target=run_island,
+            args=(island, island_seed, configs, worker_nets(configs, nets), queues[island], queues[(island + 1) % n_islands], results, deadline)
+        )
+        process.start()
+        processes.append(process)
+
+    # Collect the best gene from each island (an island that fails never sends one)
+    island_results = []
+    while len(island_results) < n_islands:
+        try:
+            island_results.append(results.get(timeout=result_poll_interval))
+        except queue.Empty:
+            failed = [island for island, process in enumerate(processes) if process.exitcode not in (None, 0)]
+            if failed:
+                for process in processes:
+                    process.terminate()
+                raise Exception("Island {i} exited with code {c}".format(i=failed[0], c=processes[failed[0]].exitcode))
+
+    for process in processes:
+        process.join()
+
+    island_results.sort(key=lambda result: result[0])
+    island_costs = [result[2] for result in island_results]
+    for island, gene, cost, iterations, cpu_time in island_results:
+        debug_print("Island {i}: {n} iterations, final cost = {c}".format(i=island, n=iterations, c=cost))
+
+    # Keep the best placement
+    island, gene, cost, iterations, cpu_time = min(island_results, key=lambda result: result[2])
+
+    return gene, cost, island_costs, sum(result[4] for result in island_results)
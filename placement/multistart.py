@@ -0,0 +1,135 @@
+from util import *
+from settings import *
+from genetics import *
+from islands import island_seeds
+import concurrent.futures
+import math
+import os
+import time
+import numpy as np
+
+# Multi-start placement
+# Independent seeded runs of the genetics algorithm on a process pool, keeping
+# the best placement found by any run. With a time limit every run gets the same
+# budget, counted from when it starts (runs queued behind a busy worker still get
+# their full share)
+
+
+# Iterations between checks of the deadline
+epoch_iterations = 500
+
+
+# Circuit on each worker process (sent once when the worker starts, the nets are
+# None when the worker loads the file in configs)
+start_configs = None
+start_nets = None
+
+
+def init_start_worker(configs, nets):
+    '''
+    Set up a worker process with the circuit
+    '''
+    global start_configs, start_nets
+    start_configs = configs
+    start_nets = nets
+
+
+def run_start(start, seed, budget):
+    '''
+    Run the genetics algorithm from one seed (runs on a worker process)
+    Input:
+        start - index of the run
+        seed - random seed for the run
+        budget - seconds to run for (None to stop after n_iterations)
+    Output:
+        start, seed - the run
+        gene - best gene found
+        cost - cost of the best gene
+        iterations - number of iterations run
+        report - (process ID, CPU time) of the worker
+        evaluator_cpu_time - CPU time of the run's evaluation workers
+    '''
+    deadline = time.time() + budget if budget is not None else None
+
+    genetics = Genetics(None)
+    genetics.setup(start_configs, start_nets, seed=seed)
+    genetics.initialize()
+
+    # Evolve in short epochs so the deadline is checked regularly
+    iterations = 0
+    while iterations < n_iterations or deadline is not None:
+        if deadline is not None and time.time() >= deadline:
+            break
+
+        epoch = epoch_iterations if deadline is not None else min(epoch_iterations, n_iterations - iterations)
+        genetics.evolve(epoch)
+        iterations += epoch
+
+    genetics.set_fit_function()
+    genetics.choose_best_gene()
+    best = genetics.population.best()
+    gene = genetics.population.genes[best].copy()
+    genetics.close()
+
+    return start, seed, gene, genetics.current_cost, iterations, process_cpu_time(), genetics.evaluator_cpu_time
+
+
+def run_multistart(configs, nets, n_starts, seed=None, time_limit=None, workers=None):
+    '''
+    Run seeded copies of the genetics algorithm on a process pool
+    Input:
+        configs, nets - the circuit
+        n_starts - number of runs
+        seed - base random seed (None to seed from system entropy)
+        time_limit - seconds for all the runs, shared equally between them (None to stop after n_iterations)
+        workers - number of worker processes (None for one per CPU)
+    Output:
+        gene - best gene found by any run
+        cost - cost of the best gene
+        start_costs - list of (seed, cost, iterations) for every run
+        cpu_time - CPU time used by the worker processes
+    '''
+    seeds = island_seeds(n_starts, seed)
+
+    # The runs go in waves of one per worker, so each run gets its wave's share of the time limit
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, n_starts)
+    budget = time_limit / math.ceil(n_starts / workers) if time_limit is not None else None
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_start_worker,
+        initargs=(configs, worker_nets(configs, nets))
+    ) as pool:
+        futures = [pool.submit(run_start, start, start_seed, budget) for start, start_seed in enumerate(seeds)]
+        results = [future.result() for future in futures]
+
+    for start, start_seed, gene, cost, iterations, report, evaluator_cpu_time in results:
+        debug_print("Start {s} (seed {r}): {n} iterations, cost = {c}".format(s=start, r=start_seed, n=iterations, c=cost))
+
+    # Workers can run several starts, so each counts once with its last report
+    cpu_time = total_cpu_time([result[5] for result in results]) + sum(result[6] for result in results)
+
+    # Every run is reported (with its iterations)
+    start_costs = [(result[1], result[3], result[4]) for result in results]
+
+    # Runs that never evolved only have a random placement, so the best is kept from the others (unless no run evolved)
+    evolved = [result for result in results if result[4] > 0]
+    if not evolved:
+        evolved = results
+
+    # Keep the best placement
+    start, start_seed, gene, cost, iterations, report, evaluator_cpu_time = min(evolved, key=lambda result: result[3])
+
+    return gene, cost, start_costs, cpu_time
+
+
+def cost_summary(start_costs):
+    '''
+    Describe the spread of the final costs of a multi-start run
+    '''
+    costs = np.array([cost for seed, cost, iterations in start_costs])
+    return "min {mn}, median {md:g}, mean {me:.1f}, max {mx}, std {sd:.1f}".format(
+        mn=costs.min(), md=np.median(costs), me=costs.mean(), mx=costs.max(), sd=costs.std()
+    )
@@ -4,111 +4,151 @@ import datetime
 from tkinter import *
 from tkinter.ttk import *
 from settings import *
+from util import *
 from netlist_parser import *
 from genetics import *
+from islands import *
+from multistart import *
 
 
-# Initialize the debug log
-debug_log.write("\n\n{}\n".format("="*20))
-debug_log.write(time.strftime("%Y-%m-%d %H:%M:%S\n", time.localtime()))
-debug_log.write("{}\n".format("="*20))
+# Workers of the process pools import this module, so only run the program in the main process
+if __name__ == "__main__":
+    # Initialize the debug log
+    debug_log.write("\n\n{}\n".format("="*20))
+    debug_log.write(time.strftime("%Y-%m-%d %H:%M:%S\n", time.localtime()))
+    debug_log.write("{}\n".format("="*20))
 
-# Choose circuit
-filename = circuit_name
+    # Choose circuit
+    filename = circuit_name
 
-# Open circuit
-debug_print("Reading configurations for {}...".format(filename))
-configs, nets = parse_file("./benchmarks/{}.txt".format(filename))
+    # Open circuit
+    debug_print("Reading configurations for {}...".format(filename))
+    configs, nets = parse_file("./benchmarks/{}.txt".format(filename))
 
-if gui:
-    # Initialize GUI
-    root = Tk()
-    grid["x"] = (grid["right"] - grid["left"]) / configs["cols"]
-    grid["y"] = (grid["bottom"] - grid["top"]) / (configs["rows"] * 2 - 1)
-    frame = Frame(root, width=screensize["width"], height=screensize["height"])
-    frame.grid(row=0, column=0)
-    c = Canvas(frame, bg=background_colour, width=screensize["width"], height=screensize["height"])
-    c.pack()
+    if gui:
+        # Initialize GUI
+        root = Tk()
+        grid["x"] = (grid["right"] - grid["left"]) / configs["cols"]
+        grid["y"] = (grid["bottom"] - grid["top"]) / (configs["rows"] * 2 - 1)
+        frame = Frame(root, width=screensize["width"], height=screensize["height"])
+        frame.grid(row=0, column=0)
+        c = Canvas(frame, bg=background_colour, width=screensize["width"], height=screensize["height"])
+        c.pack()
 
-    c.create_text(
-        grid["left"],
-        20,
-        text="Circuit: {}".format(filename),
-        fill="black",
-        font=('Arial',20,'bold'),
-        anchor=W
-    )
+        c.create_text(
+            grid["left"],
+            20,
+            text="Circuit: {}".format(filename),
+            fill="black",
+            font=('Arial',20,'bold'),
+            anchor=W
+        )
 
-    debug_print("Drawing grid...")
-    for y in range(configs["rows"] * 2):
-        c.create_line(grid["left"], grid["top"] + y * grid["y"], grid["right"], grid["top"] + y * grid["y"], fill=line_colour)
-    for x in range(configs["cols"] + 1):
-        for y in range(configs["rows"]):
-            c.create_line(grid["left"] + x * grid["x"], grid["top"] + (y * 2) * grid["y"], grid["left"] + x * grid["x"], grid["top"] + (y * 2 + 1) * grid["y"], fill=line_colour)
+        debug_print("Drawing grid...")
+        for y in range(configs["rows"] * 2):
+            c.create_line(grid["left"], grid["top"] + y * grid["y"], grid["right"], grid["top"] + y * grid["y"], fill=line_colour)
+        for x in range(configs["cols"] + 1):
+            for y in range(configs["rows"]):
+                c.create_line(grid["left"] + x * grid["x"], grid["top"] + (y * 2) * grid["y"], grid["left"] + x * grid["x"], grid["top"] + (y * 2 + 1) * grid["y"], fill=line_colour)
 
-    # Initialize genetics
-    genetics = Genetics(c)
-    genetics.setup(configs, nets)
+        # Initialize genetics
+        genetics = Genetics(c)
+        genetics.setup(configs, nets)
 
-    # Add buttons
-    button_frame = Frame(root, width=screensize["width"])
-    place_button = Button(button_frame, text ="Initialize", command=genetics.initialize)
-    run_button = Button(button_frame, text ="Run Algorithm", command=genetics.run_algorithm)
+        # Add buttons
+        button_frame = Frame(root, width=screensize["width"])
+        place_button = Button(button_frame, text ="Initialize", command=genetics.initialize)
+        run_button = Button(button_frame, text ="Run Algorithm", command=genetics.run_algorithm)
 
-    button_frame.grid(row=1, column=0)
-    place_button.grid(row=0, column=0)
-    run_button.grid(row=0, column=2)
+        button_frame.grid(row=1, column=0)
+        place_button.grid(row=0, column=0)
+        run_button.grid(row=0, column=2)
 
-    # Run GUI
-    root.mainloop()
+        # Run GUI
+        root.mainloop()
+        genetics.close()
     
-else:
-    # If no GUI, record results in output file
-    out_file_name = "logs/Results__{}".format(datetime.datetime.now().strftime("%m-%d_%H-%M-%S"))
-    out_file = open(out_file_name, "w+")
-    out_file.write("Number of iterations: {}\n".format(n_iterations))
-    out_file.write("Population size: {}\n".format(population_size))
-    out_file.write("Mutation factor: {}\n".format(mutation_factor))
+    else:
+        # If no GUI, record results in output file
+        out_file_name = "logs/Results__{}".format(datetime.datetime.now().strftime("%m-%d_%H-%M-%S"))
+        out_file = open(out_file_name, "w+")
+        out_file.write("Number of iterations: {}\n".format(n_iterations))
+        out_file.write("Population size: {}\n".format(population_size))
+        out_file.write("Mutation factor: {}\n".format(mutation_factor))
+        out_file.write("Crossover operator: {}\n".format(crossover_operator))
+        out_file.write("Islands: {}\n".format(islands))
+        out_file.write("Multi-starts: {}\n".format(multi_starts))
     
-    # Initialize genetics
-    genetics = Genetics(None)
-    genetics.setup(configs, nets)
-    genetics.initialize()
+        # Initialize genetics (the islands and starts score their own populations,
+        # so the initial placement of those runs is scored without evaluation workers)
+        genetics = Genetics(None)
+        if islands > 1 or multi_starts > 1:
+            genetics.setup(configs, nets, seed=seed, workers=1)
+        else:
+            genetics.setup(configs, nets, seed=seed)
+        genetics.initialize()
             
-    # Initialize output file
-    out_file = open(out_file_name, "a+")
-    out_file.write("="*40)
-    out_file.write("\nCircuit: {}\n".format(filename))
-    start_time = datetime.datetime.now()
-    out_file.write("Start time: {}\n".format(start_time.strftime("%m-%d %H:%M:%S")))
-    out_file.write("\nInitial Placement\n")
-    out_file.write("{}\n".format(genetics.placement))
-    out_file.write("Initial Cost: {}\n".format(genetics.current_cost))
-    out_file.close()
+        # Initialize output file
+        out_file = open(out_file_name, "a+")
+        out_file.write("="*40)
+        out_file.write("\nCircuit: {}\n".format(filename))
+        start_time = datetime.datetime.now()
+        start_cpu_time = time.process_time()
+        worker_cpu_time = 0
+        out_file.write("Start time: {}\n".format(start_time.strftime("%m-%d %H:%M:%S")))
+        out_file.write("\nInitial Placement\n")
+        out_file.write("{}\n".format(genetics.placement))
+        out_file.write("Initial Cost: {}\n".format(genetics.current_cost))
+        out_file.close()
     
-    # Run genetics algorithm
-    genetics.run_algorithm()
+        # Run island model on parallel processes
+        if islands > 1:
+            deadline = time.time() + time_limit * 60 if time_limited else None
+            best_gene, best_cost, island_costs, worker_cpu_time = run_islands(configs, nets, islands, seed=seed, deadline=deadline)
+            genetics.load_gene(best_gene, best_cost)
+            print("Done! Cost = {}".format(genetics.current_cost))
         
-    # Continue running if time limit is not yet reached
-    if time_limited:
-        while datetime.datetime.now() - start_time < datetime.timedelta(minutes=time_limit):
+        # Run seeded copies on parallel processes and keep the best
+        elif multi_starts > 1:
+            limit = time_limit * 60 if time_limited else None
+            best_gene, best_cost, start_costs, worker_cpu_time = run_multistart(configs, nets, multi_starts, seed=seed, time_limit=limit, workers=multistart_workers)
+            genetics.load_gene(best_gene, best_cost)
+            print("Done! Cost = {} ({})".format(genetics.current_cost, cost_summary(start_costs)))
+        
+        else:
+            # Run genetics algorithm
             genetics.run_algorithm()
+            
+            # Continue running if time limit is not yet reached
+            if time_limited:
+                while datetime.datetime.now() - start_time < datetime.timedelta(minutes=time_limit):
+                    genetics.run_algorithm()
     
             
-    # Track time
-    end_time = datetime.datetime.now()
-    elapsed_time = end_time - start_time
+        # Stop any evaluation workers
+        genetics.close()
+        
+        # Track time (including the CPU time reported by the worker processes)
+        end_time = datetime.datetime.now()
+        elapsed_time = end_time - start_time
+        run_cpu_time = time.process_time() - start_cpu_time + worker_cpu_time + genetics.evaluator_cpu_time
     
-    # Update output file with results
-    out_file = open(out_file_name, "a+")
-    out_file.write("\nFinal Placement\n")
-    out_file.write("{}\n".format(genetics.placement))
-    out_file.write("Final Cost: {}\n".format(genetics.current_cost))
-    out_file.write("End time: {}\n".format(end_time.strftime("%m-%d %H:%M:%S")))
-    out_file.write("Elapsed time: {}\n".format(str(elapsed_time)))
-    out_file.close()
+        # Update output file with results
+        out_file = open(out_file_name, "a+")
+        out_file.write("\nFinal Placement\n")
+        out_file.write("{}\n".format(genetics.placement))
+        out_file.write("Final Cost: {}\n".format(genetics.current_cost))
+        if islands > 1:
+            out_file.write("Island Costs: {}\n".format(island_costs))
+        elif multi_starts > 1:
+            out_file.write("Start Costs (seed, cost, iterations): {}\n".format(start_costs))
+            out_file.write("Start Cost Distribution: {}\n".format(cost_summary(start_costs)))
+        out_file.write("End time: {}\n".format(end_time.strftime("%m-%d %H:%M:%S")))
+        out_file.write("Elapsed time: {}\n".format(str(elapsed_time)))
+        out_file.write("CPU time: {:.3f} s\n".format(run_cpu_time))
+        out_file.close()
 
 
     
-# Close debug log
-debug_log.close()
+    # Close debug log
+    debug_log.close()
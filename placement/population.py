@@ -0,0 +1,183 @@
+from settings import *
+import numpy as np
+import heapq
+
+
+class Population:
+    '''
+    Fixed size population of placement genes
+    Every gene is a row of one preallocated matrix, with the total cost and the
+    cost of every net kept in parallel arrays (slot i of each describes gene i)
+    The best and worst members are tracked with a min heap and a max heap of
+    (cost, version, slot) entries, entries for a replaced slot are dropped lazily
+    Identical genes are counted by their raw bytes, so the number of distinct
+    genes is known without rehashing the population
+    '''
+
+    def __init__(self, size, configs, storage=None):
+        '''
+        Allocate storage for the population
+        Input:
+            size - number of genes in the population
+            configs - holds configurations of the circuit such as the dimensions
+            storage - arrays to keep the population in (from buffers(), e.g. in shared memory)
+        '''
+        self.size = size
+        self.configs = configs
+
+        if storage is None:
+            storage = Population.buffers(size, configs)
+
+        self.genes = storage["genes"]
+        self.costs = storage["costs"]
+        self.net_costs = storage["net_costs"]
+        self.dtype = self.genes.dtype
+
+        # Heaps for the best and worst members
+        self.version = [0] * size
+        self.best_heap = []
+        self.worst_heap = []
+
+        # Key (raw bytes) of each gene and how many members hold each key
+        self.keys = [b""] * size
+        self.key_count = {}
+
+
+    @staticmethod
+    def buffers(size, configs):
+        '''
+        Allocate empty arrays for a population
+        Output:
+            storage - genes (population x cells), costs (population) and net_costs (population x nets)
+        '''
+
+        # Use the smallest integer type that can hold every location
+        n_sites = configs["cols"] * configs["rows"]
+        if n_sites <= np.iinfo(np.uint16).max + 1:
+            dtype = np.uint16
+        else:
+            dtype = np.int32
+
+        return {
+            "genes": np.zeros((size, configs["cells"]), dtype=dtype),
+            "costs": np.zeros(size, dtype=np.int64),
+            "net_costs": np.zeros((size, configs["nets"]), dtype=np.int32),
+        }
+
+
+    def __len__(self):
+        return self.size
+
+
+    def fill(self, genes, net_costs):
+        '''
+        Set every member of the population at once
+        Input:
+            genes - (population x cells) matrix of cell placements
+            net_costs - (population x nets) matrix of net costs
+        '''
+        self.genes[:] = genes
+        self.net_costs[:] = net_costs
+        self.costs[:] = self.net_costs.sum(axis=1)
+
+        # Rebuild the heaps
+        self.version = [0] * self.size
+        self.best_heap = [(int(cost), 0, slot) for slot, cost in enumerate(self.costs)]
+        self.worst_heap = [(-int(cost), 0, slot) for slot, cost in enumerate(self.costs)]
+        heapq.heapify(self.best_heap)
+        heapq.heapify(self.worst_heap)
+
+        # Count identical genes
+        self.keys = [gene.tobytes() for gene in self.genes]
+        self.key_count = {}
+        for key in self.keys:
+            self.key_count[key] = self.key_count.get(key, 0) + 1
+
+
+    def replace(self, slot, gene, net_cost):
+        '''
+        Overwrite one member of the population in place
+        Input:
+            slot - index of the member to replace
+            gene - a vector of cell placements
+            net_cost - cost of each net for the gene
+        '''
+        self.genes[slot] = gene
+        self.net_costs[slot] = net_cost
+        self.costs[slot] = self.net_costs[slot].sum()
+
+        # Update the count of identical genes
+        key = self.keys[slot]
+        self.key_count[key] -= 1
+        if self.key_count[key] == 0:
+            del self.key_count[key]
+        key = self.genes[slot].tobytes()
+        self.keys[slot] = key
+        self.key_count[key] = self.key_count.get(key, 0) + 1
+
+        # Previous entries for this slot are now stale
+        self.version[slot] += 1
+        cost = int(self.costs[slot])
+        heapq.heappush(self.best_heap, (cost, self.version[slot], slot))
+        heapq.heappush(self.worst_heap, (-cost, self.version[slot], slot))
+
+        # Drop stale entries from the top of each heap
+        self.clean(self.best_heap)
+        self.clean(self.worst_heap)
+
+        # Rebuild once the heaps are mostly stale entries
+        if len(self.best_heap) > 4 * self.size:
+            self.best_heap = [entry for entry in self.best_heap if entry[1] == self.version[entry[2]]]
+            self.worst_heap = [entry for entry in self.worst_heap if entry[1] == self.version[entry[2]]]
+            heapq.heapify(self.best_heap)
+            heapq.heapify(self.worst_heap)
+
+
+    def clean(self, heap):
+        '''
+        Pop entries of replaced members off the top of a heap
+        '''
+        while heap[0][1] != self.version[heap[0][2]]:
+            heapq.heappop(heap)
+
+
+    def same(self, slot1, slot2):
+        '''
+        Check whether two members hold the same gene
+        '''
+        return self.keys[slot1] == self.keys[slot2]
+
+
+    def distinct(self):
+        '''
+        Number of distinct genes in the population
+        '''
+        return len(self.key_count)
+
+
+    def best(self):
+        '''
+        Index of the member with the lowest cost
+        '''
+        return self.best_heap[0][2]
+
+
+    def worst(self):
+        '''
+        Index of the member with the highest cost
+        '''
+        return self.worst_heap[0][2]
+
+
+    def lowest_cost(self):
+        '''
+        Lowest cost in the population
+        '''
+        return self.best_heap[0][0]
+
+
+    def highest_cost(self):
+        '''
+        Highest cost in the population
+        '''
+        return -self.worst_heap[0][0]
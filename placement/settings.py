@@ -5,6 +5,9 @@ debug = False
 single_circuit = True
 circuit_name = "cm138a"
 
+# Directory for the binary cache of parsed netlists (None to always parse the text file)
+netlist_cache_dir = "./cache"
+
 # Update GUI (True for full speed, False for delayed updates)
 gui = True
 
@@ -23,10 +26,33 @@ population_size = 100
 n_iterations = 10000
 mutation_factor = 5
 
+# Crossover operator ("single_point", "pmx", "order", "cycle" or "uniform")
+crossover_operator = "single_point"
+
+# Mutation type ("move" to an empty location or "swap" two cells)
+mutation_type = "move"
+
 # Control whether algorithm stops at iteration limit or time limit
 time_limited = False
 time_limit = 60
 
+# Worker processes that score the population through shared memory (1 to score in this process)
+evaluation_workers = 1
+
+# Multi-start (independent seeded runs on a process pool keeping the best, 1 to disable)
+multi_starts = 1
+# Worker processes for multi-start (None for one per CPU)
+multistart_workers = None
+
+# Random seed (None to seed from system entropy)
+seed = None
+
+# Island model (number of populations evolved in parallel processes, 1 to disable)
+islands = 1
+# Iterations between migrations and number of best genes sent to the next island
+migration_interval = 500
+migration_size = 2
+
 grid = {}
 grid["left"] = canvas_border
 grid["right"] = screensize["width"] - canvas_border
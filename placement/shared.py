@@ -0,0 +1,215 @@
+from settings import *
+from util import *
+from wirelength import *
+from population import *
+import concurrent.futures
+from multiprocessing import shared_memory
+import numpy as np
+
+# Shared memory for worker processes
+# The netlist arrays, the population matrices and a batch of the same shape for
+# new genes (immigrants and other children scored together) are published once
+# in shared memory blocks, and workers attach to them by name instead of
+# receiving pickled copies. Workers score rows of the population or of the batch
+# and write the costs back in place
+
+
+class SharedArrays:
+    '''
+    NumPy arrays kept in multiprocessing shared memory blocks
+    The process that publishes the arrays owns the blocks (and unlinks them when
+    done), other processes attach to them with the spec
+    '''
+
+    def __init__(self, blocks, arrays, owner):
+        '''
+        Use publish() or attach() to create
+        '''
+        self.blocks = blocks
+        self.arrays = arrays
+        self.owner = owner
+
+
+    @classmethod
+    def publish(cls, arrays):
+        '''
+        Copy arrays into new shared memory blocks
+        Input:
+            arrays - dictionary of NumPy arrays
+        '''
+        blocks = {}
+        shared = {}
+        for key, array in arrays.items():
+            array = np.asarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            shared[key] = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[key][...] = array
+            blocks[key] = block
+
+        return cls(blocks, shared, True)
+
+
+    @classmethod
+    def attach(cls, spec):
+        '''
+        Attach to arrays published by another process (no copy)
+        Input:
+            spec - description of the blocks (from spec())
+        '''
+        blocks = {}
+        shared = {}
+        for key, (name, shape, dtype) in spec.items():
+            block = shared_memory.SharedMemory(name=name)
+            shared[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            blocks[key] = block
+
+        return cls(blocks, shared, False)
+
+
+    def spec(self):
+        '''
+        Name, shape and type of every block (small enough to send to other processes)
+        '''
+        return {key: (self.blocks[key].name, array.shape, array.dtype.str) for key, array in self.arrays.items()}
+
+
+    def close(self):
+        '''
+        Detach from the blocks (and free them if this process published them)
+        '''
+        self.arrays = {}
+        for block in self.blocks.values():
+            block.close()
+            if self.owner:
+                block.unlink()
+        self.blocks = {}
+
+
+# Shared state of each worker process
+worker_netlist = None
+worker_blocks = None
+worker_engine = None
+
+
+def init_worker(configs, netlist_spec, block_specs):
+    '''
+    Attach a worker process to the shared netlist and gene blocks
+    Input:
+        configs - holds configurations of the circuit such as the dimensions
+        netlist_spec - spec of the shared netlist arrays
+        block_specs - spec of each block of genes ("population" and "batch")
+    '''
+    global worker_netlist, worker_blocks, worker_engine
+    worker_netlist = SharedArrays.attach(netlist_spec)
+    worker_blocks = {name: SharedArrays.attach(spec) for name, spec in block_specs.items()}
+    worker_engine = WirelengthEngine.from_arrays(configs, worker_netlist.arrays)
+
+
+def evaluate_rows(block, start, end):
+    '''
+    Score rows [start, end) of a shared block of genes in place (runs on a worker process)
+    Output:
+        report - (process ID, CPU time) of the worker
+    '''
+    arrays = worker_blocks[block].arrays
+    net_costs = worker_engine.net_costs(arrays["genes"][start:end])
+    arrays["net_costs"][start:end] = net_costs
+    arrays["costs"][start:end] = net_costs.sum(axis=1)
+
+    return process_cpu_time()
+
+
+class SharedEvaluator:
+    '''
+    Scores the population on a pool of worker processes through shared memory
+    '''
+
+    def __init__(self, configs, engine, size, workers):
+        '''
+        Publish the netlist, an empty population and an empty batch and start the workers
+        Input:
+            configs - holds configurations of the circuit such as the dimensions
+            engine - WirelengthEngine of the circuit
+            size - number of genes in the population (and in a batch)
+            workers - number of worker processes
+        '''
+        self.size = size
+        self.workers = workers
+        self.netlist = SharedArrays.publish(engine.arrays())
+        self.blocks = {
+            "population": SharedArrays.publish(Population.buffers(size, configs)),
+            "batch": SharedArrays.publish(Population.buffers(size, configs)),
+        }
+
+        # Storage for a Population
+        self.population = self.blocks["population"].arrays
+
+        # CPU time reported by the workers
+        self.cpu_reports = []
+
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(configs, self.netlist.spec(), {name: block.spec() for name, block in self.blocks.items()})
+        )
+
+
+    def evaluate_block(self, block, start, end):
+        '''
+        Score rows [start, end) of a shared block of genes, split between the workers
+        '''
+        bounds = np.linspace(start, end, min(self.workers, end - start) + 1).astype(int)
+        futures = [self.pool.submit(evaluate_rows, block, int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        for future in futures:
+            self.cpu_reports.append(future.result())
+
+
+    def evaluate(self, start=0, end=None):
+        '''
+        Score rows [start, end) of the shared population (every row by default)
+        The genes must already be in population["genes"], the costs are written to
+        population["net_costs"] and population["costs"]
+        '''
+        if end is None:
+            end = self.size
+
+        self.evaluate_block("population", start, end)
+
+
+    def net_costs(self, genes):
+        '''
+        Score new genes (not in the population) through the shared batch
+        Input:
+            genes - list of vectors of cell placements
+        Output:
+            net_costs - (genes x nets) matrix of net costs
+        '''
+        batch = self.blocks["batch"].arrays
+        net_costs = []
+
+        # Up to a population of genes at a time
+        for start in range(0, len(genes), self.size):
+            chunk = genes[start:start + self.size]
+            batch["genes"][:len(chunk)] = chunk
+            self.evaluate_block("batch", 0, len(chunk))
+            net_costs.append(batch["net_costs"][:len(chunk)].copy())
+
+        return np.concatenate(net_costs)
+
+
+    def cpu_time(self):
+        '''
+        CPU time used by the workers so far
+        '''
+        return total_cpu_time(self.cpu_reports)
+
+
+    def close(self):
+        '''
+        Stop the workers and free the shared memory
+        '''
+        self.pool.shutdown()
+        self.population = None
+        self.netlist.close()
+        for block in self.blocks.values():
+            block.close()
@@ -0,0 +1,75 @@
+from settings import *
+import numpy as np
+import random
+
+
+class FreeSites:
+    '''
+    Track which locations on the grid are still empty
+    Keeps a boolean occupancy array plus a pool of the empty locations (with the
+    position of each location in the pool) so that checking, taking, releasing
+    and randomly choosing a location are all O(1)
+    '''
+
+    def __init__(self, n_sites, occupied=()):
+        '''
+        Input:
+            n_sites - number of locations on the grid (cols * rows)
+            occupied - locations that are already taken
+        '''
+        taken = np.zeros(n_sites, dtype=bool)
+        taken[np.asarray(occupied, dtype=np.intp)] = True
+
+        # Pool of empty locations and where each location sits in the pool
+        pool = np.flatnonzero(~taken)
+        position = np.full(n_sites, -1, dtype=np.intp)
+        position[pool] = np.arange(len(pool))
+
+        self.occupied = taken.tolist()
+        self.pool = pool.tolist()
+        self.position = position.tolist()
+
+
+    def __len__(self):
+        return len(self.pool)
+
+
+    def is_free(self, site):
+        '''
+        Check whether a location is empty
+        '''
+        return not self.occupied[site]
+
+
+    def take(self, site):
+        '''
+        Mark an empty location as occupied
+        '''
+        assert not self.occupied[site]
+        self.occupied[site] = True
+
+        # Swap the last location in the pool into the removed spot
+        i = self.position[site]
+        last = self.pool.pop()
+        if last != site:
+            self.pool[i] = last
+            self.position[last] = i
+        self.position[site] = -1
+
+
+    def release(self, site):
+        '''
+        Mark an occupied location as empty
+        '''
+        assert self.occupied[site]
+        self.occupied[site] = False
+
+        self.position[site] = len(self.pool)
+        self.pool.append(site)
+
+
+    def sample(self):
+        '''
+        Choose an empty location at random (without taking it)
+        '''
+        return self.pool[random.randrange(len(self.pool))]
@@ -1,7 +1,12 @@
 from settings import *
+import os
+import sys
 import time
 import math
 
+# Modules shared by the placement and partition packages (e.g. the netlist parser)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "common"))
+
 def debug_print(content):
     '''
     Special print statement (prints only in debug mode, otherwise logs to file)
@@ -119,6 +124,29 @@ def draw_line(orig, dest, c, grid, colour="gray", tag="", extra_point=None):
         )
         
         
+def process_cpu_time():
+    '''
+    CPU time used by this process, with its process ID (worker processes report
+    this so that the main process can add up their CPU time, whatever the start method)
+    '''
+    return os.getpid(), time.process_time()
+
+
+def total_cpu_time(reports):
+    '''
+    Add up the CPU time of worker processes
+    Input:
+        reports - (process ID, CPU time) reports (a reused worker counts once, with its latest report)
+    Output:
+        cpu_time - total CPU time of the workers
+    '''
+    latest = {}
+    for pid, seconds in reports:
+        latest[pid] = max(latest.get(pid, 0), seconds)
+
+    return sum(latest.values())
+
+
 def check_add_cells(cell, additional_cells):
     '''
     Check if a (cell) has already been added to the list of (additional_cells)
@@ -151,6 +179,7 @@ def initalize_results_file(filename):
     results_log.write("Population Size: {}\n".format(population_size))
     results_log.write("n Iterations: {}\n".format(n_iterations))
     results_log.write("Mutation Factor: {}\n".format(mutation_factor))
+    results_log.write("Crossover Operator: {}\n".format(crossover_operator))
     results_log.close()
     
     
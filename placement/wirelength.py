@@ -0,0 +1,223 @@
+from settings import *
+import numpy as np
+
+
+# Largest fraction of the cells that can move for a child to be re-scored from its parent
+# (past this, finding and gathering the touched nets costs more than scoring every net)
+incremental_moved_fraction = 0.05
+
+
+class WirelengthEngine:
+    '''
+    Vectorized half perimeter cost for a circuit
+    The nets are flattened once into CSR style arrays so that every bounding box
+    can be found with NumPy reductions instead of a Python loop over each net
+    '''
+
+    def __init__(self, configs, nets):
+        '''
+        Build the flat net arrays for the current circuit
+        Input:
+            configs - holds configurations of the circuit such as the dimensions
+            nets - list of nets and the cells for each
+        '''
+        self.configs = configs
+        self.rows = configs["rows"]
+
+        # Number of cells on each net
+        self.net_degrees = np.array([len(net) for net in nets], dtype=np.intp)
+
+        # Every net must have at least one cell (same as calculate_half_perimeter)
+        assert np.all(self.net_degrees > 0)
+
+        # Offset of the first cell of each net in the flat pin list
+        self.net_offsets = np.zeros(len(nets) + 1, dtype=np.intp)
+        np.cumsum(self.net_degrees, out=self.net_offsets[1:])
+        self.net_starts = self.net_offsets[:-1]
+
+        # Flat list of the cells on every net
+        self.pins = np.array([cell for net in nets for cell in net], dtype=np.intp)
+
+        # Cell to nets index (nets touching each cell, in CSR form)
+        pin_nets = np.repeat(np.arange(len(nets), dtype=np.intp), self.net_degrees)
+        self.cell_net_offsets = np.zeros(configs["cells"] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.pins, minlength=configs["cells"]), out=self.cell_net_offsets[1:])
+        self.cell_nets = pin_nets[np.argsort(self.pins, kind="stable")]
+
+        # Extra cost added to every net when assumption 2 is ignored
+        self.net_constant = 2 if "2" in no_assumptions else 0
+
+
+    # Arrays that describe the circuit (everything else is derived from them)
+    array_names = ("net_degrees", "net_offsets", "pins", "cell_net_offsets", "cell_nets")
+
+
+    def arrays(self):
+        '''
+        Flat net arrays of the engine (to share with other processes)
+        '''
+        return {name: getattr(self, name) for name in self.array_names}
+
+
+    @classmethod
+    def from_arrays(cls, configs, arrays):
+        '''
+        Create an engine from existing flat net arrays without copying them
+        Input:
+            configs - holds configurations of the circuit such as the dimensions
+            arrays - dictionary of arrays (from arrays())
+        '''
+        engine = cls.__new__(cls)
+        engine.configs = configs
+        engine.rows = configs["rows"]
+        for name in cls.array_names:
+            setattr(engine, name, arrays[name])
+        engine.net_starts = engine.net_offsets[:-1]
+        engine.net_constant = 2 if "2" in no_assumptions else 0
+
+        return engine
+
+
+    @classmethod
+    def from_netlist(cls, configs, netlist):
+        '''
+        Create an engine from the arrays of a parsed netlist (from load_netlist) without copying them
+        '''
+        return cls.from_arrays(configs, {
+            "net_degrees": netlist["net_degrees"],
+            "net_offsets": netlist["net_offsets"],
+            "pins": netlist["pins"],
+            "cell_net_offsets": netlist["cell_offsets"],
+            "cell_nets": netlist["cell_nets"],
+        })
+
+
+    def bounding_boxes(self, genes, pins=None, starts=None):
+        '''
+        Find the bounding box of every net
+        Input:
+            genes - a vector of cell placements, or a (population x cells) matrix of them
+            pins, starts - flat pin list and segment starts (defaults to every net)
+        Output:
+            width, height - (x_max - x_min) and (y_max - y_min) for each net (per gene)
+        '''
+        if pins is None:
+            pins = self.pins
+            starts = self.net_starts
+
+        # Locations of every pin (last axis runs over the pins)
+        locations = np.asarray(genes, dtype=np.intp)[..., pins]
+        x = locations // self.rows
+        y = locations % self.rows
+
+        # Reduce each net segment to its bounds
+        axis = locations.ndim - 1
+        width = np.maximum.reduceat(x, starts, axis=axis) - np.minimum.reduceat(x, starts, axis=axis)
+        height = np.maximum.reduceat(y, starts, axis=axis) - np.minimum.reduceat(y, starts, axis=axis)
+
+        return width, height
+
+
+    def net_costs(self, genes, pins=None, starts=None):
+        '''
+        Calculate the half perimeter for every net
+        Input:
+            genes - a vector of cell placements, or a (population x cells) matrix of them
+            pins, starts - flat pin list and segment starts (defaults to every net)
+        Output:
+            costs - half perimeter of each net (same as calculate_half_perimeter)
+        '''
+        width, height = self.bounding_boxes(genes, pins, starts)
+
+        costs = width + height + self.net_constant
+
+        # No assumption 1 (add in routing track in the vertical dimension)
+        if "1" in no_assumptions:
+            costs += height
+
+        return costs
+
+
+    def cost(self, gene):
+        '''
+        Calculate the total half perimeter cost of a gene
+        '''
+        return int(self.net_costs(gene).sum())
+
+
+    def population_costs(self, genes):
+        '''
+        Calculate the total half perimeter cost of every gene in one call
+        Input:
+            genes - (population x cells) matrix of cell placements
+        Output:
+            costs - total cost of each gene
+        '''
+        genes = np.asarray(genes, dtype=np.intp).reshape(-1, self.configs["cells"])
+
+        return self.net_costs(genes).sum(axis=1)
+
+
+    def nets_of(self, cells):
+        '''
+        Find every net touching a set of cells
+        Input:
+            cells - list of cell IDs
+        Output:
+            nets - sorted array of net IDs
+        '''
+        index, starts = segments(self.cell_net_offsets, cells)
+
+        return np.unique(self.cell_nets[index])
+
+
+    def update_net_costs(self, gene, net_costs, moved_cells):
+        '''
+        Re-score only the nets touching cells that moved
+        Input:
+            gene - a vector of cell placements (after the move)
+            net_costs - cost of each net before the move
+            moved_cells - list of cell IDs whose location changed
+        Output:
+            costs - cost of each net after the move
+        '''
+        # Cheaper to start over when many cells moved
+        if len(moved_cells) > incremental_moved_fraction * self.configs["cells"]:
+            return self.net_costs(gene)
+
+        costs = np.array(net_costs, copy=True)
+
+        # Nets that need to be re-scored
+        nets = self.nets_of(moved_cells)
+        if len(nets) == 0:
+            return costs
+
+        # Cheaper to start over when most pins are affected
+        index, starts = segments(self.net_offsets, nets)
+        if 2 * len(index) > len(self.pins):
+            return self.net_costs(gene)
+
+        costs[nets] = self.net_costs(gene, self.pins[index], starts)
+
+        return costs
+
+
+def segments(offsets, ids):
+    '''
+    Gather the CSR segments for a subset of rows
+    Input:
+        offsets - CSR offsets (row i spans offsets[i] to offsets[i+1])
+        ids - rows to gather
+    Output:
+        index - position of every entry of the selected rows
+        starts - start of each selected row within index
+    '''
+    ids = np.asarray(ids, dtype=np.intp)
+    lengths = offsets[ids + 1] - offsets[ids]
+
+    starts = np.zeros(len(ids), dtype=np.intp)
+    np.cumsum(lengths[:-1], out=starts[1:])
+
+    index = np.arange(lengths.sum(), dtype=np.intp) - np.repeat(starts - offsets[ids], lengths)
+
+    return index, starts